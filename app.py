@@ -1,65 +1,317 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, abort, g, jsonify, render_template, request, url_for
 from datetime import datetime, timezone
-import logging
-from sports_data import get_all_events
-from fantasy_football_data import get_current_week_matchups
+import importlib, logging, mimetypes, os, threading, time
+import metrics
+from history_log import QUERY_LIMIT, history
+from logo_cache import LOGO_MAX_AGE, logos, url_for_key
+from profiles import LAYOUTS, MODES, PROFILE_COOKIE, profiles
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s  %(levelname)s: %(message)s")
 
 app = Flask(__name__)
 
-app.config["TICKER_MODE"] = "sports"
-
 startup_time = datetime.now(timezone.utc).isoformat()
 
+STREAM_KEEPALIVE = 15   # seconds between SSE comments on a quiet stream
+STATIC_MAX_AGE   = 365 * 24 * 3600   # for /static URLs carrying a ?v= version
+PER_PAGE         = (2, 60)           # accepted /data?per= range, in card slots
+PAGE_COLS        = (1, 6)            # accepted /data?cols= range, in grid columns
+NFL_GATE_TTL     = 20                # seconds between fantasy-only NFL fetches
+
+# TICKER_REPLAY=<fixtures dir> serves recorded ESPN responses (see replay.py)
+if os.getenv("TICKER_REPLAY"):
+    importlib.import_module("replay").replay(os.getenv("TICKER_REPLAY"))
+
+
+# ─────────────────────────── mode backends
+# Each display mode's backend is imported and built the first time a request
+# needs it, not at startup: the page itself renders without either, a
+# sports-only install never loads espn_api/dotenv, and the poller restores
+# its snapshot from disk on the first /data rather than before Flask serves.
+def _load_sports():
+    from poller import ScoreboardPoller
+    from schedule import Schedule
+    poller = ScoreboardPoller(schedule=Schedule())
+    # started here, inside a request, so the dev-server reloader parent never polls
+    poller.start()
+    return poller
+
+def _load_fantasy():
+    fantasy = importlib.import_module("fantasy_football_data")
+    fantasy.watch_nfl(_nfl_games)
+    return fantasy
+
+BACKENDS = {"sports": _load_sports, "fantasy": _load_fantasy}
+_backends = {}
+_backends_lock = threading.Lock()
+
+def backend(mode: str):
+    """The backend for `mode`, loaded on first use."""
+    loaded = _backends.get(mode)
+    if loaded is None:
+        with _backends_lock:
+            loaded = _backends.get(mode)
+            if loaded is None:
+                started = time.perf_counter()
+                loaded = _backends[mode] = BACKENDS[mode]()
+                logging.info("%s backend loaded in %.0f ms", mode,
+                             (time.perf_counter() - started) * 1e3)
+    return loaded
+
+def _nfl_games():
+    """
+    NFL events for the fantasy refresh gate; None until they are live and
+    healthy. Read from the sports poller when a display has loaded it;
+    otherwise only NFL is fetched, at most every NFL_GATE_TTL seconds.
+    """
+    poller = _backends.get("sports")
+    if poller is None:
+        return _fetch_nfl()
+    state = poller.snapshot.leagues.get("NFL")
+    if state is None or state.updated is None or state.error or state.stale:
+        return None
+    return state.events
+
+_nfl_fetched = (float("-inf"), None)   # (monotonic fetch time, events or None)
+_nfl_lock    = threading.Lock()
+
+def _fetch_nfl():
+    global _nfl_fetched
+    with _nfl_lock:
+        fetched, games = _nfl_fetched
+        if time.monotonic() - fetched >= NFL_GATE_TTL:
+            sports_data = importlib.import_module("sports_data")
+            events, alert = sports_data.fetch_league("NFL")
+            games = None if alert else events
+            _nfl_fetched = (time.monotonic(), games)
+        return games
+
+@app.before_request
+def start_timer():
+    metrics.share()     # per worker process, so not at import under preload_app
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_request(resp):
+    endpoint = request.endpoint or "unknown"
+    if "started" in g:
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - g.started,
+                                     endpoint, str(resp.status_code))
+    if not resp.is_streamed and resp.content_length:
+        metrics.HTTP_BYTES.inc(endpoint, amount=resp.content_length)
+    return resp
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/version")
 def version():
     return {"startup": startup_time}
 
+@app.context_processor
+def static_urls():
+    def static_url(filename):
+        """/static URL versioned by mtime, so it can be cached for good."""
+        mtime = os.path.getmtime(os.path.join(app.static_folder, filename))
+        return url_for("static", filename=filename, v=int(mtime))
+    return {"static_url": static_url}
+
 @app.after_request
 def add_header(resp):
-    if resp.cache_control.max_age is not None:
+    if request.endpoint == "static":
+        if "v" in request.args:
+            resp.cache_control.no_cache = None
+            resp.cache_control.public = True
+            resp.cache_control.max_age = STATIC_MAX_AGE
+            resp.cache_control.immutable = True
+        return resp
+    # everything is no-store except responses explicitly marked immutable
+    if resp.cache_control.max_age is not None and not resp.cache_control.immutable:
         resp.cache_control.max_age = 0
         resp.cache_control.no_store = True
         resp.headers['Pragma'] = 'no-cache'
         resp.expires = -1
     return resp
 
+def _profile():
+    """The requesting display's profile: ?token=, ?profile=, then its cookie."""
+    token, name = request.args.get("token"), request.args.get("profile")
+    if token or name:
+        profile = profiles.get(name, token)
+        if profile is None:
+            abort(404)
+        return profile
+    # a cookie naming a since-removed profile falls back to the default
+    return profiles.get(request.cookies.get(PROFILE_COOKIE)) or profiles.get()
+
 @app.route("/set_mode", methods=["POST"])
 def set_mode():
     data = request.json
     mode = data.get("mode")
-    if mode in ("sports", "fantasy"):
-        app.config["TICKER_MODE"] = mode
-        return {"status": "ok", "mode": mode}
+    if mode in MODES:
+        name = data.get("profile") or _profile().name
+        if profiles.get(name) is None:
+            return {"status": "error", "message": "Unknown profile"}, 404
+        profiles.set_mode(name, mode)
+        return {"status": "ok", "mode": mode, "profile": name}
     return {"status": "error", "message": "Invalid mode"}, 400
 
 
 @app.route("/")
 def index():
-    mode = app.config["TICKER_MODE"]
-    if mode == "sports":
-        return render_template("index.html")
-    elif mode == "fantasy":
-        return render_template("fantasy.html")
+    profile = _profile()
+    page = "fantasy.html" if profile.mode == "fantasy" else "index.html"
+    # ?layout=pages tries paging on one display without editing its profile
+    layout = request.args.get("layout")
+    resp = app.make_response(render_template(
+        page, layout=layout if layout in LAYOUTS else profile.layout))
+    # /data, /stream and /set_mode from this page follow the same profile
+    if request.cookies.get(PROFILE_COOKIE) != profile.name:
+        resp.set_cookie(PROFILE_COOKIE, profile.name, max_age=365 * 24 * 3600,
+                        samesite="Lax")
+    return resp
 
 @app.route("/data")
 def data():
-    mode = app.config["TICKER_MODE"]
+    profile = _profile()
+    mode = profile.mode
     if mode == "sports":
-        events, alert = get_all_events()
-        return jsonify({
-            "events": events,
-            "alert": alert
-        })
+        poller = backend("sports")
+        poller.wait_ready()
+        # ?per=<card slots>&cols=<columns>&page=<n>: one page of the live-first ordering
+        per = request.args.get("per", type=int)
+        if per is not None:
+            per = min(max(per, PER_PAGE[0]), PER_PAGE[1])
+            cols = min(max(request.args.get("cols", 2, type=int), PAGE_COLS[0]), PAGE_COLS[1])
+            return _send_snapshot(poller.snapshot, profile.view,
+                                  (per, cols, request.args.get("page", 0, type=int)))
+        return _send_snapshot(poller.snapshot, profile.view)
     elif mode == "fantasy":
-        events = get_current_week_matchups()
-        return jsonify({
-            "events": events
-        })
+        # ?since=<version>: only the scores that changed, when still possible.
+        # The version is read before the events: a refresh landing in between
+        # just means the next delta re-sends values the client already has.
+        fantasy = backend("fantasy")
+        version, delta = fantasy.matchups_since(request.args.get("since"))
+        events = fantasy.get_current_week_matchups()
+        updated = fantasy.matchups_updated()
+        body = {
+            "version": version,
+            "updated": updated,
+            "age": int(time.time() - updated) if updated else None,
+            "refresh": fantasy.BOX_TTL,
+        }
+        if delta is not None:
+            return jsonify({**body, "delta": delta})
+        return jsonify({**body, "events": events})
     else:
         return jsonify({"error": "Invalid mode"}), 400
 
+@app.route("/fantasy/player/<int:player_id>")
+def fantasy_player(player_id):
+    """Full espn_api stats for one player, fetched by the page on demand."""
+    stats = backend("fantasy").player_stats(player_id)
+    if stats is None:
+        abort(404)
+    return jsonify({"id": player_id, "stats": stats})
+
+@app.route("/history")
+def history_endpoint():
+    """
+    Recorded score/status/winner changes, oldest first:
+    ?event=<id> (e.g. nfl-401671793, fantasy-3-7), ?since= / ?until= epochs
+    and ?limit= (up to QUERY_LIMIT). `truncated` means there are more.
+    """
+    event = request.args.get("event") or None
+    since = request.args.get("since", 0.0, type=float)
+    until = request.args.get("until", type=float)
+    limit = min(request.args.get("limit", QUERY_LIMIT, type=int), QUERY_LIMIT)
+    changes, truncated = history.query(event, since, until, max(limit, 1))
+    return jsonify({
+        "event":     event,
+        "changes":   [{"t": t, "id": eid, **fields} for t, eid, fields in changes],
+        "truncated": truncated,
+    })
+
+@app.route("/logo/<key>")
+def logo(key):
+    """CDN logo/flag, fetched once, downscaled and cached on disk."""
+    url = url_for_key(key)
+    if not url:
+        abort(404)
+    try:
+        data = logos.get(url)
+    except Exception as e:
+        logging.warning("logo fetch failed for %s: %s", url, e)
+        abort(502)
+    resp = Response(data, mimetype=mimetypes.guess_type(url)[0] or "image/png")
+    resp.cache_control.public = True
+    resp.cache_control.max_age = LOGO_MAX_AGE
+    resp.cache_control.immutable = True
+    return resp
+
+def _send_snapshot(snap, view=None, page=None):
+    """
+    Serve a snapshot's pre-encoded body (or one (per, cols, n) page of it),
+    honoring ETag and Accept-Encoding.
+    """
+    if page is None:
+        body = snap.view(view)
+    else:
+        n, body = snap.page(view, *page)
+    coding = body.negotiate(request.accept_encodings)
+    resp = Response(body.get(coding), mimetype="application/json")
+    if coding != "identity":
+        resp.headers["Content-Encoding"] = coding
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Age"] = str(max(int(time.time() - snap.generated), 0))
+    tag = f"{startup_time}-{snap.version}"
+    if view is not None:
+        tag += f"-{hash(view) & 0xffffffff:x}"
+    if page is not None:
+        tag += f"-p{page[0]}x{page[1]}.{n}"
+    resp.set_etag(tag, weak=True)
+    return resp.make_conditional(request)
+
+def _sse(event: str, body: str, version: int) -> str:
+    return f"id: {version}\nevent: {event}\ndata: {body}\n\n"
+
+@app.route("/stream")
+def stream():
+    """
+    Server-Sent Events feed of the sports snapshot: one `snapshot` event on
+    connect (or when the client fell too far behind), then `delta` events
+    carrying only the games that changed, as seen by the display's profile.
+    """
+    view = _profile().view
+    poller = backend("sports")
+    poller.wait_ready()
+
+    def events():
+        snap = poller.snapshot
+        yield _sse("snapshot", snap.view(view).raw.decode(), snap.version)
+        last = snap.version
+        while True:
+            deltas = poller.wait_deltas(last, STREAM_KEEPALIVE, view)
+            if deltas is None:
+                snap = poller.snapshot
+                yield _sse("snapshot", snap.view(view).raw.decode(), snap.version)
+                last = snap.version
+                continue
+            sent = False
+            for version, body in deltas:
+                last = version
+                if body is not None:
+                    yield _sse("delta", body, version)
+                    sent = True
+            if not sent:
+                yield ": keepalive\n\n"
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache",
+                             "X-Accel-Buffering": "no"})
+
 if __name__ == "__main__":
-    app.run(debug=True, port=5050)
+    # development only; production runs `gunicorn -c gunicorn.conf.py app:app`
+    app.run(debug=True, port=5050, threaded=True)
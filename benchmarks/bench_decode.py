@@ -0,0 +1,90 @@
+"""
+Scoreboard decode cost: the full json.loads tree vs the streamed,
+field-projected decode, for every parser that declares fields. Also
+checks both parse to identical events.
+
+    python benchmarks/bench_decode.py [--fixtures fixtures/sat] [--repeat 10]
+
+Columns, per league body:
+  ms      best decode time
+  peak    tracemalloc peak while decoding
+  kept    memory still held by the decoded result (what the response
+          cache's StartIndex keeps alive until the body changes)
+  app     which of the two sports_data.decode picks for this body
+          (streamed only at STREAM_MIN_BYTES and up)
+"""
+import argparse, json, os, sys, tempfile, time, tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import replay
+import sports_data
+from benchmarks.run import SLATES, build_slate
+
+
+def measure(decode, body, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        decode(body)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    raw = decode(body)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return raw, best, peak, kept
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--fixtures", help="recorded fixtures folder (default: saturday slate)")
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    folder = args.fixtures
+    if folder is None:
+        folder = tempfile.mkdtemp(prefix="slate-saturday-")
+        build_slate(folder, SLATES["saturday"])
+
+    paths = {"full": lambda tree: json.loads}
+    if sports_data.STREAM_DECODE:
+        paths["streamed"] = lambda tree: lambda body: {"events": [
+            sports_data.project(ev, tree)
+            for ev in sports_data.ijson.items(body, "events.item", use_float=True)]}
+    else:
+        print("(ijson with a C backend not installed: no streamed column)")
+
+    ctx = sports_data.TimeContext()
+    head = "".join(f" {p + ' ms':>13} {'peak KiB':>9} {'kept KiB':>9}" for p in paths)
+    print(f"{'league':22} {'body KiB':>9}{head}  app")
+    totals = {p: [0, 0, 0] for p in paths}
+    for name, cfg in sports_data.LEAGUES.items():
+        parser = cfg["parser"]
+        path = os.path.join(folder, replay.fixture_name(cfg["url"]))
+        if not os.path.exists(path) or getattr(parser, "fields", None) is None:
+            continue
+        with open(path, "rb") as f:
+            body = f.read()
+        row, parsed = f"{name:22} {len(body) / 1024:9.1f}", {}
+        for label, make in paths.items():
+            raw, secs, peak, kept = measure(make(parser.fields), body, args.repeat)
+            sports_data._STARTS.clear()
+            parsed[label] = [ev.to_dict() for ev in parser(raw, ctx)]
+            row += f" {secs * 1e3:13.2f} {peak / 1024:9.0f} {kept / 1024:9.0f}"
+            for i, v in enumerate((secs, peak, kept)):
+                totals[label][i] += v
+        streams = sports_data.STREAM_DECODE and len(body) >= sports_data.STREAM_MIN_BYTES
+        print(f"{row}  {'streamed' if streams else 'full'}")
+        for label, events in parsed.items():
+            if events != parsed["full"]:
+                sys.exit(f"MISMATCH: {name} parses differently from the {label} decode")
+
+    row = f"{'total':22} {'':9}"
+    for secs, peak, kept in totals.values():
+        row += f" {secs * 1e3:13.2f} {peak / 1024:9.0f} {kept / 1024:9.0f}"
+    print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Parse throughput: descriptor-compiled parsers vs the legacy per-league loops.
+
+    python benchmarks/bench_parsers.py [--events 400] [--repeat 20]
+
+Each parser runs over the same decoded scoreboard. The engine gets one
+TimeContext per crawl, as get_all_events does, and its start-date cache is
+warm after the first crawl, as it is in the poller.
+"""
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sports_data
+from benchmarks import legacy_parsers
+from benchmarks.scoreboards import team_scoreboard
+
+
+def bench(fn, raw, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(raw)
+        best = min(best, time.perf_counter() - t0)
+    return best, len(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--events", type=int, default=400)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    raw = team_scoreboard(args.events)
+    cases = [
+        ("NCAA Football (grace window)", legacy_parsers.parse_ncaaf,
+         sports_data.LEAGUES["NCAA Football"]["parser"]),
+        ("MLB (all events)", legacy_parsers.parse_mlb,
+         sports_data.LEAGUES["MLB"]["parser"]),
+    ]
+
+    print(f"{args.events} events, best of {args.repeat}")
+    print(f"{'league':32} {'legacy ev/s':>12} {'engine ev/s':>12} {'speedup':>8}")
+    for label, legacy, engine in cases:
+        ctx = sports_data.TimeContext()
+        t_old, n_old = bench(legacy, raw, args.repeat)
+        t_new, n_new = bench(lambda r: engine(r, ctx), raw, args.repeat)
+        assert n_old == n_new, (label, n_old, n_new)
+        print(f"{label:32} {args.events / t_old:12,.0f} {args.events / t_new:12,.0f} "
+              f"{t_old / t_new:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
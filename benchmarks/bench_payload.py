@@ -0,0 +1,72 @@
+"""
+/data payload cost: dict events + jsonify per request vs slotted Event
+objects + a body encoded once per snapshot.
+
+    python benchmarks/bench_payload.py [--events 400] [--requests 200]
+"""
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+import sports_data
+from benchmarks.scoreboards import team_scoreboard
+from models import EncodedBody
+
+
+def sizes(objs, values):
+    """(container bytes, bytes with every distinct field value) for `objs`."""
+    containers = sum(sys.getsizeof(o) for o in objs)
+    seen = {}
+    for o in objs:
+        for v in values(o):
+            seen[id(v)] = sys.getsizeof(v)
+    return containers, containers + sum(seen.values())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--events", type=int, default=400)
+    ap.add_argument("--requests", type=int, default=200)
+    args = ap.parse_args()
+
+    raw = team_scoreboard(args.events)
+    parse = sports_data.LEAGUES["MLB"]["parser"]     # "all" window keeps every game
+    ctx = sports_data.TimeContext()
+
+    # the same events either way, so both hold the same field values
+    events = parse(raw, ctx)
+    dicts = [ev.to_dict() for ev in events]
+    ev_sizes = sizes(events, lambda ev: [getattr(ev, k) for k in ev.__slots__])
+    dict_sizes = sizes(dicts, dict.values)
+    print(f"{len(events)} events held in memory   {'containers':>12} {'with values':>12}")
+    print(f"  dict per event     {dict_sizes[0] / 1024:12.1f} {dict_sizes[1] / 1024:12.1f} KiB")
+    print(f"  slotted Event      {ev_sizes[0] / 1024:12.1f} {ev_sizes[1] / 1024:12.1f} KiB")
+    for label, d, e in zip(("containers", "with values"), dict_sizes, ev_sizes):
+        print(f"  {label:18} Event {d / e if d >= e else e / d:.2f}x "
+              f"{'smaller' if d >= e else 'larger'}")
+
+    app = Flask(__name__)
+    payload = {"events": dicts, "alert": None}
+    with app.app_context():
+        t0 = time.perf_counter()
+        for _ in range(args.requests):
+            jsonify(payload).get_data()
+        t_jsonify = (time.perf_counter() - t0) / args.requests
+
+    body = EncodedBody.of({"events": events, "alert": None})
+    body.get("gzip")                                   # built once per snapshot
+    t0 = time.perf_counter()
+    for _ in range(args.requests):
+        body.get("gzip")
+    t_cached = (time.perf_counter() - t0) / args.requests
+
+    print(f"per /data request ({args.requests} requests)")
+    print(f"  jsonify            {t_jsonify * 1e6:10.1f} µs")
+    print(f"  cached body        {t_cached * 1e6:10.1f} µs")
+    print(f"  body size          {len(body.raw):,} B raw, {len(body.get('gzip')):,} B gzip")
+
+
+if __name__ == "__main__":
+    main()
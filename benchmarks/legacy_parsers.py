@@ -0,0 +1,109 @@
+"""
+Frozen copies of the per-league parse loops as they were before the
+descriptor-driven engine, kept only as a baseline for bench_parsers.py.
+NFL/NBA/NCAAMB/NHL were line-for-line the same as parse_ncaaf.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+
+def team_logo(team_json):
+    if team_json["team"].get("logo"):
+        return team_json["team"]["logo"]
+    logos = team_json["team"].get("logos") or []
+    return logos[0]["href"] if logos else ""
+
+
+def parse_mlb(raw_json) -> list[dict]:
+    out = []
+    today = datetime.now(ZoneInfo("America/New_York")).date()
+    for ev in raw_json.get("events", []):
+        comp = ev["competitions"][0]
+        status = comp["status"]["type"]
+        state = status["state"]
+        if state == "pre":
+            ongoing = False
+        else:
+            ongoing = state != "post"
+
+        teams = comp["competitors"]
+        home = next(t for t in teams if t["homeAway"] == "home")
+        away = next(t for t in teams if t["homeAway"] == "away")
+
+        away_pts = int(away.get("score", 0))
+        home_pts = int(home.get("score", 0))
+
+        out.append({
+            "id":        f"mlb-{comp['id']}",
+            "league":    "MLB",
+            "away":      away["team"]["shortDisplayName"],
+            "away_logo": team_logo(away),
+            "home":      home["team"]["shortDisplayName"],
+            "home_logo": team_logo(home),
+            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
+            "status":    status["shortDetail"],
+            "winner":    "away" if state=="post" and away_pts>home_pts
+                        else "home" if state=="post" and home_pts>away_pts
+                        else None,
+            "ongoing":   ongoing,
+            "state":     state,
+            "start":     comp["date"],
+        })
+    return out
+
+# ─────────────────────────── ATP Men's Singles parser
+
+
+def parse_ncaaf(raw_json) -> list[dict]:
+    """
+    ESPN College-Football scoreboard → canonical event list.
+    Shows games that *start today* in U.S. Eastern Time
+    (+ unfinished late games from last night if before 4 AM ET).
+    """
+    tz_et = ZoneInfo("America/New_York")
+    now_et = datetime.now(tz_et)
+    today = now_et.date()
+    yday = today - timedelta(days=1)
+    keep_yday = now_et.hour < 4  # same grace window
+
+    out = []
+    for ev in raw_json.get("events", []):
+        comp = ev["competitions"][0]
+
+        # local start date in ET
+        local_date = datetime.fromisoformat(
+            comp["date"].replace("Z", "+00:00")
+        ).astimezone(tz_et).date()
+
+        if local_date not in (today, yday):
+            continue
+        if local_date == yday and not keep_yday:
+            continue
+
+        status = comp["status"]["type"]
+        state = status["state"] # pre | in | post
+
+        teams = comp["competitors"]
+        home = next(t for t in teams if t["homeAway"] == "home")
+        away = next(t for t in teams if t["homeAway"] == "away")
+
+        away_pts = int(away.get("score", 0))
+        home_pts = int(home.get("score", 0))
+
+        out.append({
+            "id":        f"ncaaf-{comp['id']}",
+            "league":    "NCAA Football",
+            "away":      away["team"]["shortDisplayName"],
+            "away_logo": away["team"]["logo"],
+            "home":      home["team"]["shortDisplayName"],
+            "home_logo": home["team"]["logo"],
+            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
+            "status":    status["shortDetail"],   # "Final", "3rd 08:15", etc.
+            "winner":    "away" if state=="post" and away_pts>home_pts
+                        else "home" if state=="post" and home_pts>away_pts
+                        else None,
+            "ongoing":   state not in ("pre", "post"),
+            "state":     state,
+            "start":     comp["date"],
+        })
+    return out
@@ -0,0 +1,152 @@
+"""
+How many displays can one ticker server sustain? Ramps up simulated
+kiosks against a running server and reports latency and errors per step.
+
+    gunicorn -c gunicorn.conf.py app:app &
+    python benchmarks/loadtest.py http://localhost:5000 [--displays 10,50,100,200]
+
+Each simulated display loads the page and its stylesheets, then either
+holds a /stream open (--mode sse, what index.html does) or polls /data
+every --interval seconds (--mode poll, the no-EventSource fallback and
+fantasy.html). A probe thread times /data throughout each step, so "p95"
+is what a display reconnecting or reloading at that load would see.
+Run it from another machine on the LAN to keep the client off the Pi's CPU.
+
+Every open /stream holds one gunicorn thread (until its next keepalive
+after the display goes away), and a worker can accept more than its share
+of them, so with --mode sse the ceiling is about TICKER_THREADS displays
+no matter how many workers there are; past it the probe starts timing
+out. Steps are separated by --settle seconds so the previous step's
+streams are released first.
+"""
+import argparse, re, threading, time
+
+import requests
+
+
+class Display(threading.Thread):
+    def __init__(self, base, mode, interval, profile, stats):
+        super().__init__(daemon=True)
+        self.base, self.mode, self.interval = base, mode, interval
+        self.query = f"?profile={profile}" if profile else ""
+        self.stats = stats
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = "gzip"
+        self.stream = None
+        self.stop = threading.Event()
+
+    def run(self):
+        try:
+            page = self.session.get(self.base + "/" + self.query, timeout=30)
+            page.raise_for_status()
+            for href in re.findall(r'href="(/static/[^"]+)"', page.text):
+                self.session.get(self.base + href.replace("&amp;", "&"), timeout=30)
+            if self.mode == "sse":
+                self._listen()
+            else:
+                self._poll()
+        except Exception as e:
+            if not self.stop.is_set():
+                self.stats.error(e)
+
+    def _listen(self):
+        t0 = time.perf_counter()
+        self.stream = self.session.get(self.base + "/stream", stream=True, timeout=60)
+        self.stream.raise_for_status()
+        for line in self.stream.iter_lines():
+            if line.startswith(b"event: snapshot"):
+                self.stats.connected(time.perf_counter() - t0)
+            if self.stop.is_set():
+                break
+
+    def _poll(self):
+        self.stats.connected(0)
+        while not self.stop.is_set():
+            self.stats.timed(self.session, self.base + "/data")
+            self.stop.wait(self.interval)
+
+    def close(self):
+        self.stop.set()
+        if self.stream is not None:
+            self.stream.close()
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies, self.setup = [], []
+        self.errors, self.streams = 0, 0
+
+    def timed(self, session, url, timeout=10):
+        t0 = time.perf_counter()
+        try:
+            session.get(url, timeout=timeout).raise_for_status()
+        except Exception as e:
+            self.error(e)
+            return
+        with self.lock:
+            self.latencies.append(time.perf_counter() - t0)
+
+    def connected(self, secs):
+        with self.lock:
+            self.streams += 1
+            self.setup.append(secs)
+
+    def error(self, e):
+        with self.lock:
+            self.errors += 1
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] * 1e3 if values else float("nan")
+
+
+def run_step(args, n):
+    stats = Stats()
+    displays = [Display(args.url, args.mode, args.interval, args.profile, stats) for _ in range(n)]
+    for d in displays:
+        d.start()
+    probe = requests.Session()
+    probe.headers["Accept-Encoding"] = "gzip"
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        stats.timed(probe, args.url + "/data")
+        time.sleep(1 / args.probe_rate)
+    for d in displays:
+        d.close()
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("url", nargs="?", default="http://localhost:5000")
+    ap.add_argument("--displays", default="10,25,50,100,200",
+                    help="comma-separated display counts to ramp through")
+    ap.add_argument("--mode", choices=("sse", "poll"), default="sse")
+    ap.add_argument("--interval", type=float, default=5, help="poll mode: seconds between /data")
+    ap.add_argument("--duration", type=float, default=30, help="seconds per step")
+    ap.add_argument("--probe-rate", type=float, default=10, help="probe /data requests per second")
+    ap.add_argument("--profile", help="display profile every simulated kiosk uses")
+    ap.add_argument("--settle", type=float, default=16,
+                    help="sse mode: pause between steps (> app.STREAM_KEEPALIVE)")
+    args = ap.parse_args()
+    args.url = args.url.rstrip("/")
+
+    print(f"{args.url}  mode={args.mode}  {args.duration:.0f}s per step")
+    print(f"{'displays':>8} {'connected':>9} {'setup p95':>10} {'requests':>9} "
+          f"{'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for i, n in enumerate(map(int, args.displays.split(","))):
+        if i and args.mode == "sse":
+            time.sleep(args.settle)
+        s = run_step(args, n)
+        print(f"{n:8d} {s.streams:9d} {pct(s.setup, .95):10.1f} {len(s.latencies):9d} "
+              f"{s.errors:7d} {pct(s.latencies, .5):8.1f} {pct(s.latencies, .95):8.1f} "
+              f"{pct(s.latencies, .99):8.1f}")
+        if s.errors or pct(s.latencies, .95) > 1000:
+            print("stopping: errors, or p95 /data over a second")
+            break
+
+
+if __name__ == "__main__":
+    main()
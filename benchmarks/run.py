@@ -0,0 +1,151 @@
+"""
+Offline benchmark suite: parse throughput, crawl time, /data latency and
+memory, all served through replay.ReplayAdapter (no network needed).
+
+    python benchmarks/run.py                       # synthetic slates
+    python benchmarks/run.py --fixtures fixtures/sat   # + a recorded slate
+
+Slates:
+  typical   a normal weeknight across every league
+  saturday  worst case: 100-game NCAA football Saturday, 180 college
+            basketball games, a two-week tennis major, full F1 weekend
+  recorded  whatever `python replay.py capture <dir>` saved (optional)
+"""
+import argparse, json, os, statistics, sys, tempfile, time, tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# keep the benchmark away from the real snapshot cache
+os.environ.setdefault("TICKER_CACHE", os.path.join(tempfile.mkdtemp(), "snapshot.json"))
+
+import replay
+import sports_data
+from benchmarks.scoreboards import f1_scoreboard, team_scoreboard, tennis_scoreboard
+
+SLATES = {
+    "typical": {
+        "NFL": 2, "NCAA Football": 0, "NBA": 10, "NCAA Basketball": 40, "MLB": 0,
+        "ATP Men's Singles": 32, "WTA Women's Singles": 32, "NHL": 12, "Formula 1": 0,
+    },
+    "saturday": {
+        "NFL": 16, "NCAA Football": 100, "NBA": 14, "NCAA Basketball": 180, "MLB": 15,
+        "ATP Men's Singles": 254, "WTA Women's Singles": 254, "NHL": 16, "Formula 1": 5,
+    },
+}
+
+
+def build_slate(folder: str, sizes: dict):
+    for name, n in sizes.items():
+        cfg = sports_data.LEAGUES[name]
+        kind = cfg.get("kind", "team")
+        if kind == "tennis":
+            board = tennis_scoreboard(n, cfg["grouping"])
+        elif kind == "f1":
+            board = f1_scoreboard(sessions=n or 1)
+        else:
+            board = team_scoreboard(n, seed=hash(name) & 0xffff)
+        replay.write_fixture(folder, cfg["url"], json.dumps(board).encode())
+
+
+def reset_caches():
+    sports_data._RESPONSES.clear()
+    sports_data._STARTS.clear()
+    for health in sports_data.HEALTH.values():
+        health.succeeded(time.time())
+
+
+def bench_parse(folder: str, repeat: int):
+    """Decode + parse every league straight from its fixture file."""
+    ctx = sports_data.TimeContext()
+    rows = []
+    for name, cfg in sports_data.LEAGUES.items():
+        path = os.path.join(folder, replay.fixture_name(cfg["url"]))
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            body = f.read()
+        best, n = float("inf"), 0
+        for _ in range(repeat):
+            sports_data._STARTS.clear()
+            t0 = time.perf_counter()
+            decode = getattr(cfg["parser"], "decode", json.loads)
+            n = len(cfg["parser"](decode(body), ctx))
+            best = min(best, time.perf_counter() - t0)
+        rows.append((name, len(body), n, best))
+    return rows
+
+
+def bench_crawl(repeat: int):
+    reset_caches()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    events, _ = sports_data.get_all_events()
+    cold = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    warm = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        sports_data.get_all_events()
+        warm.append(time.perf_counter() - t0)
+    return len(events), cold, statistics.median(warm), peak
+
+
+def bench_data(app_module, requests_n: int):
+    """Refresh every league into the poller, then time /data from the test client."""
+    poller = app_module.backend("sports")
+    for name in sports_data.LEAGUES:
+        poller.refresh(name)
+    client = app_module.app.test_client()
+    timings = {}
+    for label, headers in (("identity", {}), ("gzip", {"Accept-Encoding": "gzip"})):
+        client.get("/data", headers=headers)           # first hit builds the body
+        samples = []
+        for _ in range(requests_n):
+            t0 = time.perf_counter()
+            resp = client.get("/data", headers=headers)
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+        timings[label] = (samples[len(samples) // 2], samples[int(len(samples) * .95)],
+                          len(resp.data))
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--fixtures", help="recorded fixtures folder to include")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--requests", type=int, default=200)
+    args = ap.parse_args()
+
+    folders = {}
+    for slate, sizes in SLATES.items():
+        folders[slate] = tempfile.mkdtemp(prefix=f"slate-{slate}-")
+        build_slate(folders[slate], sizes)
+    if args.fixtures:
+        folders["recorded"] = args.fixtures
+
+    import app as app_module                        # after TICKER_CACHE is set
+
+    for slate, folder in folders.items():
+        replay.install(replay.ReplayAdapter(folder))
+        print(f"\n=== {slate} ({folder})")
+
+        print(f"{'league':22} {'body KiB':>9} {'events':>7} {'parse ms':>9} {'ev/s':>10}")
+        for name, size, n, secs in bench_parse(folder, args.repeat):
+            rate = f"{n / secs:10,.0f}" if n else f"{'-':>10}"
+            print(f"{name:22} {size / 1024:9.1f} {n:7d} {secs * 1e3:9.2f} {rate}")
+
+        n, cold, warm, peak = bench_crawl(args.repeat)
+        print(f"get_all_events: {n} events, cold {cold * 1e3:.1f} ms, "
+              f"warm (unchanged bodies) {warm * 1e3:.1f} ms, peak alloc {peak / 2**20:.1f} MiB")
+
+        for label, (p50, p95, size) in bench_data(app_module, args.requests).items():
+            print(f"/data {label:8}: p50 {p50 * 1e6:7.0f} µs  p95 {p95 * 1e6:7.0f} µs  "
+                  f"{size / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Synthetic ESPN scoreboard payloads for the benchmarks.
+
+Shapes follow the site.api.espn.com scoreboard JSON closely enough for the
+parsers in sports_data, including the bulk the parsers ignore (odds,
+broadcasts, leaders, notes) so decode/parse costs are realistic.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+STATES = (("pre", "Sat, 8:00 PM EDT"), ("in", "3rd 08:15"), ("post", "Final"))
+
+
+def _competitor(i, side, rng):
+    score = rng.randint(0, 56)
+    return {
+        "id": str(i), "homeAway": side, "score": str(score),
+        "winner": False,
+        "team": {
+            "id": str(i), "abbreviation": f"T{i}",
+            "displayName": f"Team {i} University", "shortDisplayName": f"Team {i}",
+            "color": "003087", "alternateColor": "ffffff",
+            "logo": f"https://a.espncdn.com/i/teamlogos/ncaa/500/{i}.png",
+            "links": [{"href": f"https://www.espn.com/college-football/team/_/id/{i}",
+                       "text": "Clubhouse"}] * 4,
+        },
+        "linescores": [{"value": float(rng.randint(0, 14))} for _ in range(4)],
+        "statistics": [{"name": f"stat{k}", "displayValue": str(rng.random())}
+                       for k in range(8)],
+        "records": [{"name": "overall", "summary": "7-2"}, {"name": "home", "summary": "4-0"}],
+        "leaders": [{"name": "passingYards", "leaders": [
+            {"displayValue": "250 YDS", "athlete": {"fullName": f"Player {i}-{k}",
+             "headshot": f"https://a.espncdn.com/i/headshots/{i}{k}.png"}}]} for k in range(3)],
+    }
+
+
+def team_scoreboard(n_events: int, seed: int = 0, day: datetime | None = None) -> dict:
+    """A team-sport scoreboard with `n_events` games spread across `day`."""
+    rng = random.Random(seed)
+    day = day or datetime.now(timezone.utc).replace(hour=16, minute=0, second=0, microsecond=0)
+    events = []
+    for k in range(n_events):
+        state, detail = STATES[k % 3]
+        start = day + timedelta(minutes=15 * (k % 40))
+        cid = str(401000000 + k)
+        events.append({
+            "id": cid, "uid": f"s:20~l:23~e:{cid}", "name": f"Team {2*k+1} at Team {2*k}",
+            "shortName": f"T{2*k+1} @ T{2*k}", "date": start.strftime("%Y-%m-%dT%H:%MZ"),
+            "competitions": [{
+                "id": cid, "date": start.strftime("%Y-%m-%dT%H:%MZ"),
+                "attendance": rng.randint(10000, 100000),
+                "venue": {"fullName": f"Stadium {k}", "address": {"city": "Town", "state": "ST"}},
+                "status": {"clock": 0.0, "period": 3,
+                           "type": {"state": state, "shortDetail": detail,
+                                    "completed": state == "post"}},
+                "competitors": [_competitor(2 * k, "home", rng), _competitor(2 * k + 1, "away", rng)],
+                "broadcasts": [{"market": "national", "names": ["ESPN", "ESPN2"]}],
+                "odds": [{"provider": {"name": "ESPN BET"}, "details": "T1 -3.5",
+                          "overUnder": 51.5}],
+                "notes": [{"type": "event", "headline": "Conference game"}],
+            }],
+            "links": [{"href": f"https://www.espn.com/game/_/gameId/{cid}"}] * 5,
+        })
+    return {"leagues": [{"id": "23", "name": "NCAA - Football"}], "events": events}
+
+
+def tennis_scoreboard(n_matches: int, slug: str = "mens-singles", seed: int = 0,
+                      days: int = 14) -> dict:
+    """A multi-week tournament: `n_matches` spread over `days` days."""
+    rng = random.Random(seed)
+    base = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    comps = []
+    for k in range(n_matches):
+        state, detail = STATES[k % 3]
+        start = base - timedelta(days=days // 2) + timedelta(days=k % days, minutes=k)
+        sets = [(rng.randint(0, 7), rng.randint(0, 7)) for _ in range(3)]
+        comps.append({
+            "id": str(170000 + k), "date": start.strftime("%Y-%m-%dT%H:%MZ"),
+            "status": {"type": {"state": state, "shortDetail": detail}},
+            "competitors": [
+                {"winner": state == "post", "athlete": {"shortName": f"A. Player{k}",
+                 "flag": {"href": "https://a.espncdn.com/i/teamlogos/countries/500/usa.png"}},
+                 "linescores": [{"value": float(a)} for a, _ in sets]},
+                {"winner": False, "athlete": {"shortName": f"B. Player{k}",
+                 "flag": {"href": "https://a.espncdn.com/i/teamlogos/countries/500/esp.png"}},
+                 "linescores": [{"value": float(b)} for _, b in sets]},
+            ],
+        })
+    return {"events": [{"id": "1", "name": "Grand Slam",
+                        "groupings": [{"grouping": {"slug": slug}, "competitions": comps}]}]}
+
+
+def f1_scoreboard(sessions: int = 5, drivers: int = 20, seed: int = 0) -> dict:
+    """A race weekend with every session starting today."""
+    rng = random.Random(seed)
+    base = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    comps = []
+    for s in range(sessions):
+        state, detail = STATES[s % 3]
+        order = list(range(1, drivers + 1))
+        rng.shuffle(order)
+        comps.append({
+            "id": str(600000 + s), "date": (base + timedelta(minutes=s)).strftime("%Y-%m-%dT%H:%MZ"),
+            "type": {"abbreviation": ("FP1", "FP2", "FP3", "Qual", "Race")[s % 5]},
+            "status": {"type": {"state": state, "shortDetail": detail}},
+            "competitors": [{"id": str(d), "order": order[d], "position": order[d],
+                             "carNumber": str(d + 1),
+                             "athlete": {"shortName": f"D. Driver{d}",
+                                         "flag": {"href": "https://a.espncdn.com/f.png"}}}
+                            for d in range(drivers)],
+        })
+    return {"events": [{"id": "600", "shortName": "Test GP", "competitions": comps}]}
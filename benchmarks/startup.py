@@ -0,0 +1,111 @@
+"""
+Startup budget: how long `import app` and the first page take, where the
+import time goes (python -X importtime), and what the first /data of each
+mode costs when its backend is loaded.
+
+    python benchmarks/startup.py [--runs 5] [--budget 250]
+
+Exits non-zero if the median import + first page exceeds --budget ms, or
+if a module that should only load with its mode backend (espn_api, the
+poller, Pillow, …) is imported at startup. The default budget is for a
+desktop-class machine; pass a larger one when running on the Pi itself.
+"""
+import argparse, json, os, statistics, subprocess, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_BUDGET_MS = 250
+# loaded by backend(mode) or on first use, never by `import app`
+DEFERRED = ("fantasy_football_data", "espn_api", "dotenv", "poller", "schedule",
+            "replay", "PIL", "sports_data", "requests")
+
+STARTUP = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.app.test_client().get("/")
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "page": t2 - t1, "modules": sorted(sys.modules)}))
+"""
+
+BACKENDS = """
+import json, time
+import app
+out = {}
+for mode in app.BACKENDS:
+    t0 = time.perf_counter()
+    app.backend(mode)
+    out[mode] = time.perf_counter() - t0
+print(json.dumps(out))
+"""
+
+
+def child(code: str, env: dict, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def app_imports(stderr: str):
+    """(module, cumulative µs) for each module app.py imports directly."""
+    pending, direct = [], []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == "app":
+                direct = pending
+            pending = []
+        elif depth == 1:
+            pending.append((name.strip(), int(cumulative)))
+    return sorted(direct, key=lambda m: -m[1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, help="ms")
+    ap.add_argument("--top", type=int, default=12)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ticker-startup-")
+    env = {**os.environ, "TICKER_CACHE": os.path.join(tmp, "snapshot.json"),
+           "TICKER_SHARED": ""}
+    env.pop("TICKER_REPLAY", None)
+
+    child(STARTUP, env)                                  # warm the bytecode cache
+    runs = [child(STARTUP, env)[0] for _ in range(args.runs)]
+    imp = statistics.median(r["import"] for r in runs) * 1e3
+    page = statistics.median(r["page"] for r in runs) * 1e3
+    print(f"import app   {imp:7.1f} ms   (median of {args.runs})")
+    print(f"first page   {page:7.1f} ms")
+
+    _, stderr = child(STARTUP, env, importtime=True)
+    print(f"\n{'imported by app.py':32} {'cumulative ms':>13}")
+    for name, us in app_imports(stderr)[:args.top]:
+        print(f"{name:32} {us / 1e3:13.1f}")
+
+    # backends against an empty replay folder: no network, every fetch 404s
+    backends, _ = child(BACKENDS, {**env, "TICKER_REPLAY": tmp})
+    print(f"\n{'backend (first use)':32} {'ms':>13}")
+    for mode, secs in backends.items():
+        print(f"{mode:32} {secs * 1e3:13.1f}")
+
+    failed = False
+    early = [m for m in DEFERRED if any(x == m or x.startswith(m + ".") for x in runs[0]["modules"])]
+    if early:
+        print(f"\nFAIL: imported at startup: {', '.join(early)}")
+        failed = True
+    if imp + page > args.budget:
+        print(f"\nFAIL: startup {imp + page:.1f} ms over the {args.budget:.0f} ms budget")
+        failed = True
+    if not failed:
+        print(f"\nok: {imp + page:.1f} ms of {args.budget:.0f} ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
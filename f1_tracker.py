@@ -0,0 +1,53 @@
+from dataclasses import replace
+
+
+class SessionTracker:
+    """
+    Running order of each F1 session between polls. update() gives every
+    driver row a `gain` (places gained at the last change in the running
+    order, negative for places lost) and hands back the previous session
+    object when neither the order nor anything else moved, so the poller's
+    diff sees no change for it. Parsed sessions are never modified.
+    """
+
+    def __init__(self):
+        self._last = {}     # session id → last tracked FormulaOneSession
+
+    def update(self, sessions) -> list:
+        last = {}
+        for s in sessions:
+            last[s.id] = self._track(self._last.get(s.id), s)
+        self._last = last
+        return list(last.values())
+
+    def _track(self, prev, s):
+        if prev is None or prev.state == "pre" or s.state == "pre":
+            gains = {}      # entry list ordered by car number: no race order yet
+        elif _order(prev.field) == _order(s.field):
+            gains = {r["id"]: r.get("gain", 0) for r in prev.field}
+        else:
+            before = dict(_order(prev.field))
+            gains = {rid: before[rid] - pos for rid, pos in _order(s.field) if rid in before}
+        field = [{**r, "gain": gains.get(r["id"], 0)} for r in s.field]
+        tracked = replace(s, field=field)
+        return prev if tracked == prev else tracked
+
+
+def _order(field):
+    return [(r["id"], r["pos"]) for r in field]
+
+
+def field_delta(old: list, new: list) -> dict:
+    """
+    How a session's `field` changed, for an SSE delta: `rows` holds only
+    the driver rows that differ, plus `row_order` (driver ids) if the order
+    changed. The whole `field` when the drivers themselves changed.
+    """
+    before = {r.get("id"): r for r in old}
+    if len(before) != len(new) or any(r.get("id") not in before for r in new):
+        return {"field": new}
+    out = {"rows": [r for r in new if before[r["id"]] != r]}
+    ids = [r["id"] for r in new]
+    if ids != [r["id"] for r in old]:
+        out["row_order"] = ids
+    return out
@@ -1,33 +1,130 @@
-import os
+import json, logging, os, threading, time
+from collections import deque
 from dotenv import load_dotenv
 from espn_api.football import League
+from espn_api.football.box_score import BoxScore
+
+import metrics
+from history_log import history
+from snapshot_store import store
 
 load_dotenv()
 
+LEAGUE_ID   = 482514371
+LEAGUE_YEAR = 2024
+LEAGUE_TTL  = 6 * 3600   # settings, teams, rosters, draft: refreshed this often
+BOX_TTL     = 30         # box scores are shared by every display for this long
+DELTA_HISTORY = 32       # refreshes a display can fall behind and still get a delta
+IDLE_TTL    = 3600       # re-pull this often even when no rostered NFL game is moving
+
+_lock    = threading.Lock()
+_league  = None          # the one League instance, built on first use
+_loaded  = 0.0           # epoch its static metadata was last (re)fetched
+_period  = {}            # scoring period → (pro schedule, positional ratings)
+_matchups = store.fantasy() or (0.0, None)   # (epoch, events), seeded from disk
+_pulling  = threading.Lock()                 # held while a refresh is running
+_stats    = {}           # player id → espn_api stats dict, served by player_stats()
+_feed_lock = threading.Lock()                # guards _matchups/_version/_deltas updates
+_version  = 0                                # bumped whenever a refresh changes anything
+_boot     = os.urandom(4).hex()              # per process: tokens from another worker or an
+                                             # earlier run never match (see matchups_since)
+_deltas   = deque(maxlen=DELTA_HISTORY)      # (version, delta or None for a reshape)
+_nfl_games = None        # () → current NFL Events or None; installed by watch_nfl()
+_nfl_seen  = {}          # rostered NFL game id → (state, score) at the last refresh
+_checked   = 0.0         # epoch the NFL join last found nothing worth re-pulling
+
+
 def _player_list(players):
+    # stats are kept server-side (player_stats) instead of in every payload
+    for p in players:
+        _stats[p.playerId] = p.stats
     return [{
+        "id": p.playerId,
         "name": p.name,
         "pos": p.position,
         "lineup_slot": p.lineupSlot,
         "score": p.points,
         "pro_team": p.proTeam,
-        "stats": p.stats
     } for p in players]
 
 
-def get_league():
-    league = League(
-        league_id=482514371,
-        year=2024,
-        espn_s2=os.getenv("ESPN_S2"),
-        swid=os.getenv("SWID"),
-        debug=False
-    )
-    return league
+def player_stats(player_id: int):
+    """The full espn_api stats of a player from the latest refresh, or None."""
+    return _stats.get(player_id)
+
+
+def get_league(max_age=LEAGUE_TTL):
+    """
+    Long-lived League. The first call pays for the full constructor; after
+    that the static league metadata is only re-pulled once it is older than
+    `max_age` seconds (which also moves `current_week` forward).
+    """
+    global _league, _loaded
+    with _lock:
+        if _league is None:
+            with metrics.FANTASY_SECONDS.time("league"):
+                _league = League(
+                    league_id=LEAGUE_ID,
+                    year=LEAGUE_YEAR,
+                    espn_s2=os.getenv("ESPN_S2"),
+                    swid=os.getenv("SWID"),
+                    debug=False
+                )
+            _loaded = time.time()
+        elif time.time() - _loaded > max_age:
+            with metrics.FANTASY_SECONDS.time("refresh"):
+                _league.refresh()
+            _period.clear()
+            _loaded = time.time()
+        return _league
+
+
+def _period_context(league, period):
+    """Pro schedule and positional ratings for a scoring period, fetched once."""
+    if period not in _period:
+        _period.clear()
+        with metrics.FANTASY_SECONDS.time("period_context"):
+            _period[period] = (league._get_pro_schedule(period),
+                               league._get_positional_ratings(period))
+    return _period[period]
+
+
+def box_scores(league, _rolled=False):
+    """
+    Box scores for the league's current scoring period. Unlike
+    League.box_scores() this only re-requests the matchup scores each tick;
+    the per-period pro schedule and ratings come from _period_context.
+    If ESPN reports a later scoring period than the cached league, the
+    metadata is refreshed early so the new week is picked up.
+    """
+    period = league.current_week
+    params = {
+        "view": ["mMatchupScore", "mScoreboard"],
+        "scoringPeriodId": period,
+    }
+    filters = {"schedule": {"filterMatchupPeriodIds": {"value": [league.currentMatchupPeriod]}}}
+    with metrics.FANTASY_SECONDS.time("box_scores"):
+        data = league.espn_request.league_get(
+            params=params, headers={"x-fantasy-filter": json.dumps(filters)})
+
+    latest = data.get("scoringPeriodId", period)
+    if not _rolled and period < latest <= league.finalScoringPeriod:
+        logging.info("fantasy scoring period %s → %s, refreshing league", period, latest)
+        return box_scores(get_league(max_age=0), _rolled=True)
+
+    pro_schedule, ratings = _period_context(league, period)
+    boxes = [BoxScore(m, pro_schedule, ratings, period, league.year)
+             for m in data["schedule"]]
+
+    teams = {team.team_id: team for team in league.teams}
+    for box in boxes:
+        box.home_team = teams.get(box.home_team, box.home_team)
+        box.away_team = teams.get(box.away_team, box.away_team)
+    return boxes
 
 
 def get_matchup_data(league):
-    matchups = league.box_scores(week=1)
+    matchups = box_scores(league)
     events = []
     for match in matchups:
         # Home and Away names and scores
@@ -36,6 +133,7 @@ def get_matchup_data(league):
         home_score = match.home_score
         away_score = match.away_score
         events.append({
+            "id": f"{away_team.team_id}-{home_team.team_id}",
             "home": home_team.team_name,
             "away": away_team.team_name,
             "home_score": home_score,
@@ -45,7 +143,160 @@ def get_matchup_data(league):
         })
     return events
 
+# ─────────────────────────── per-player diffs
+PLAYER_FIELDS = ("score", "lineup_slot")
+
+
+def _shape(events):
+    """Matchup ids with their players in order; deltas only apply within one shape."""
+    return [(m.get("id"), [p.get("id") for p in m["away_players"]],
+             [p.get("id") for p in m["home_players"]]) for m in events]
+
+
+def diff_matchups(old, new) -> dict | None:
+    """
+    Team scores and player fields that changed between two refreshes, or
+    None when matchups or rosters were reshaped (a full payload is needed).
+    """
+    if old is None or _shape(old) != _shape(new):
+        return None
+    matchups, players = [], []
+    for before, after in zip(old, new):
+        if (before["away_score"], before["home_score"]) != (after["away_score"], after["home_score"]):
+            matchups.append({"id": after["id"], "away_score": after["away_score"],
+                             "home_score": after["home_score"]})
+        for side in ("away_players", "home_players"):
+            for p0, p1 in zip(before[side], after[side]):
+                changed = {k: p1[k] for k in PLAYER_FIELDS if p0[k] != p1[k]}
+                if changed:
+                    players.append({"id": p1["id"], **changed})
+    return {"matchups": matchups, "players": players}
+
+
+def matchups_since(token: str | None):
+    """
+    (current version token, merged delta since `token`), or (current token,
+    None) when `token` is missing, from another process, too old or a
+    reshape happened since. Tokens are "<boot id>:<version>": each gunicorn
+    worker counts its own refreshes, so a token is only compared with the
+    counter of the process that issued it.
+    """
+    with _feed_lock:
+        version, deltas = _version, list(_deltas)
+    issuer = f"{_boot}-{os.getpid()}"      # the pid too, should this be imported pre-fork
+    current = f"{issuer}:{version}"
+    boot, _, since = (token or "").partition(":")
+    if boot != issuer or not since.isdigit():
+        return current, None
+    since = int(since)
+    if since == version:
+        return current, {"matchups": [], "players": []}
+    pending = [d for v, d in deltas if v > since]
+    if not deltas or deltas[0][0] > since + 1 or since > version or None in pending:
+        return current, None
+    matchups, players = {}, {}
+    for d in pending:
+        matchups.update((m["id"], m) for m in d["matchups"])
+        for p in d["players"]:
+            players[p["id"]] = {**players.get(p["id"], {}), **p}
+    return current, {"matchups": list(matchups.values()), "players": list(players.values())}
+
+
+# ─────────────────────────── NFL join
+def watch_nfl(games):
+    """
+    Gate background refreshes on the NFL scoreboard. `games()` returns the
+    current NFL Events, or None while they are unknown or failing (which
+    falls back to re-pulling every BOX_TTL).
+    """
+    global _nfl_games
+    _nfl_games = games
+
+
+def rostered_teams(events) -> set:
+    """Pro team abbreviations of every player in the matchups, bench included."""
+    return {p["pro_team"] for m in events
+            for side in ("away_players", "home_players") for p in m[side]}
+
+
+def rostered_games(events, games) -> list:
+    """The NFL games a rostered player is playing in."""
+    teams = rostered_teams(events)
+    return [g for g in games if g.away_abbr in teams or g.home_abbr in teams]
+
+
+def _moving(events, fetched) -> bool:
+    """
+    Whether a re-pull can change anything: a rostered player's game is on,
+    or one started, ended or changed score since the last refresh.
+    """
+    if _nfl_games is None or time.time() - fetched > IDLE_TTL:
+        return True
+    games = _nfl_games()
+    if games is None:
+        return True
+    games = rostered_games(events, games)
+    return (any(g.ongoing for g in games)
+            or {g.id: (g.state, g.score) for g in games} != _nfl_seen)
+
+
+def refresh_matchups():
+    global _matchups, _version, _nfl_seen
+    games = _nfl_games() if _nfl_games else None   # read first: later changes re-trigger
+    try:
+        with metrics.FANTASY_SECONDS.time("matchups"):
+            events = get_matchup_data(get_league())
+    except Exception:
+        metrics.FANTASY_ERRORS.inc()
+        raise
+    delta = diff_matchups(_matchups[1], events)
+    with _feed_lock:
+        if delta is None or delta["matchups"] or delta["players"]:
+            _version += 1
+            _deltas.append((_version, delta))
+        _matchups = (time.time(), events)
+    if games is not None:
+        _nfl_seen = {g.id: (g.state, g.score) for g in rostered_games(events, games)}
+    store.save_fantasy(*_matchups)
+    history.observe_matchups(events)
+    return events
+
+
+def _refresh_in_background():
+    if not _pulling.acquire(blocking=False):
+        return                      # one already in flight
+
+    def run():
+        try:
+            refresh_matchups()
+        except Exception as e:
+            logging.warning("fantasy refresh failed: %s", e)
+        finally:
+            _pulling.release()
+
+    threading.Thread(target=run, name="fantasy-refresh", daemon=True).start()
+
+
+def matchups_updated() -> float:
+    """Epoch the served matchups are known to be current as of (0 if none)."""
+    return max(_matchups[0], _checked)
+
+
 def get_current_week_matchups():
-    league = get_league()
-    events = get_matchup_data(league)
-    return events
\ No newline at end of file
+    """
+    Latest matchups. Only the very first call (nothing in memory or on disk)
+    blocks on ESPN; afterwards results older than BOX_TTL are served as-is
+    while a background pull replaces them, unless the NFL join shows no
+    rostered player's game has moved since (see watch_nfl).
+    """
+    global _checked
+    fetched, events = _matchups
+    if events is None:
+        return refresh_matchups()
+    if time.time() - max(fetched, _checked) > BOX_TTL:
+        if _moving(events, fetched):
+            _refresh_in_background()
+        else:
+            _checked = time.time()
+            metrics.FANTASY_SKIPPED.inc()
+    return events
@@ -0,0 +1,31 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:app
+#
+# gthread workers: every open /stream (one per display) parks a thread in
+# poller.wait_deltas, and /data is a pre-encoded bytes write, so threads
+# are cheap and a couple of processes cover the Pi's cores for templates,
+# static files and gzip. One worker polls ESPN; the others follow the
+# snapshot it shares through TICKER_SHARED (see poller.py). Next to that
+# file the workers also share /set_mode switches (profiles.py) and their
+# /metrics samples (metrics.py); cache/ holds one snapshot file per
+# section (snapshot_store.py), and one worker at a time writes the
+# history log (history_log.py).
+import os
+
+bind         = os.getenv("TICKER_BIND", "0.0.0.0:5000")
+workers      = int(os.getenv("TICKER_WORKERS", 2))
+worker_class = "gthread"
+# each connected display holds a thread, and one worker may end up with
+# most of them, so size this for every display in the house plus headroom
+threads      = int(os.getenv("TICKER_THREADS", 64))
+timeout      = 60        # worker heartbeat, not a request limit under gthread
+keepalive    = 5
+graceful_timeout = 5     # SSE streams never finish on their own
+# import the app once in the master: every worker then reports the same
+# /version startup stamp, so kiosks don't reload when they hit another worker
+preload_app  = True
+
+# tmpfs when available, so followers' once-a-second reads never touch the SD card
+os.environ.setdefault("TICKER_SHARED",
+                      "/dev/shm/ticker-live.json" if os.path.isdir("/dev/shm")
+                      else os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                        "cache", "live.json"))
@@ -0,0 +1,426 @@
+import gzip, json, logging, os, tempfile, threading, time
+
+from models import to_json
+from snapshot_store import FLUSH_DELAY, STORE_PATH
+
+try:                        # Unix only; elsewhere every process records on its own
+    import fcntl
+except ImportError:
+    fcntl = None
+
+HISTORY_DIR   = os.getenv("TICKER_HISTORY",
+                          os.path.join(os.path.dirname(STORE_PATH), "history"))
+HISTORY_MB    = float(os.getenv("TICKER_HISTORY_MB", 64))   # disk budget for sealed segments
+SEGMENT_BYTES = 1 << 20     # the open segment is sealed (gzipped) once it reaches this
+EVENT_FIELDS  = ("score", "status", "winner", "state")
+QUERY_LIMIT   = 1000
+LAST_MAX      = 20000       # ids whose last state is remembered, least recently seen dropped
+
+
+def event_fields(ev) -> dict:
+    """The recorded state of a sports event; F1 sessions record their running order."""
+    fields = {k: getattr(ev, k) for k in EVENT_FIELDS if hasattr(ev, k)}
+    if getattr(ev, "field", None) is not None:
+        fields["order"] = [row["name"] for row in ev.field]
+    return fields
+
+
+def matchup_fields(m: dict) -> dict:
+    return {"score": f"{m['away_score']} : {m['home_score']}"}
+
+
+class _Segment:
+    """A sealed segment: gzipped records plus the ids and time span they cover."""
+    __slots__ = ("path", "t0", "t1", "ids", "size")
+
+    def __init__(self, path, t0, t1, ids, size):
+        self.path, self.t0, self.t1, self.ids, self.size = path, t0, t1, ids, size
+
+
+class HistoryLog:
+    """
+    Append-only log of per-event state transitions. observe() compares each
+    event with the last state recorded for it and queues only the fields
+    that changed, as compact JSON lines `[seconds since segment start, id,
+    {field: value}]`. Lines are appended to the open segment in batches
+    (at most every FLUSH_DELAY); at SEGMENT_BYTES it is gzipped and sealed
+    with a sidecar index of the event ids and time span it holds, and the
+    oldest sealed segments are deleted to stay within HISTORY_MB.
+
+    query() skips every sealed segment whose index rules it out, so looking
+    up one game only decompresses the segments that mention it.
+
+    Only one process writes the log: the poll leader, once the poller calls
+    lead(). It holds an flock on the folder's .leader.lock for life and on
+    .writer.lock while it writes. Other processes (gunicorn workers that
+    only refresh fantasy matchups) append what they observe to their own
+    spool-<pid>.jsonl, which the writer merges every FLUSH_DELAY, so no
+    transition is logged twice and no observation is dropped. With no poll
+    leader (a fantasy-only install), the first process to observe holds
+    .writer.lock instead, and hands it over when a leader appears. A new
+    writer seeds the last state of each event from the newest segments, so
+    a restart does not re-record unchanged states.
+    """
+
+    def __init__(self, folder=HISTORY_DIR, budget_mb=HISTORY_MB):
+        self.folder  = folder
+        self.budget  = budget_mb * 2**20
+        self._lock   = threading.Lock()
+        self._io     = threading.Lock()     # serializes flush/seal against each other
+        self._index  = threading.Lock()     # guards _sealed
+        self._last   = {}      # event id → last recorded (or, until elected, spooled) fields
+        self._queue  = []      # (epoch, id, changed fields) not yet on disk
+        self._sealed = {}      # path → _Segment, cached from the sidecar indexes
+        self._locks  = {}      # lock file name → (pid, open file), opened per process
+        self._writer_pid  = None   # pid that writes the log
+        self._leader_pid  = None   # pid whose poller called lead()
+
+    # ---- recording
+    def observe(self, items, now=None):
+        """Record changes in (id, fields) pairs, e.g. from event_fields()."""
+        now = int(now or time.time())
+        with self._lock:
+            if self._writer_pid == os.getpid() or self._elect():
+                self._record(now, items)
+            else:
+                self._spool(now, items)
+
+    def _record(self, now, items):
+        for eid, fields in items:
+            changed = self._diff(eid, fields)
+            if changed:
+                self._queue.append((now, eid, changed))
+
+    def _diff(self, eid, fields) -> dict:
+        """The fields that changed since `eid` was last seen; remembers `fields`."""
+        # re-inserted on every sighting: the oldest ids are those gone from the feeds
+        last = self._last.pop(eid, {})
+        self._last[eid] = fields
+        while len(self._last) > LAST_MAX:
+            del self._last[next(iter(self._last))]
+        return {k: v for k, v in fields.items() if last.get(k) != v}
+
+    def _spool(self, now, items):
+        """Not the writer: append changed states for the writer to merge."""
+        lines = "".join(to_json([now, eid, fields]) + "\n"
+                        for eid, fields in items if self._diff(eid, fields))
+        if not lines:
+            return
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(os.path.join(self.folder, f"spool-{os.getpid()}.jsonl"), "a",
+                      encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)     # not while the writer drains it
+                f.write(lines)
+        except OSError as e:
+            logging.warning("history spool write failed: %s", e)
+
+    def lead(self):
+        """Called by the poll leader: this process writes the log from now on."""
+        pid = os.getpid()
+        with self._lock:
+            if self._leader_pid == pid:
+                return
+            self._leader_pid = pid
+        if fcntl is None:
+            return
+        # blocking, so off the caller's thread: waits for a fallback writer to step down
+        threading.Thread(target=self._take_over, name="history-lead", daemon=True).start()
+
+    def _take_over(self):
+        try:
+            fcntl.flock(self._lockfile(".leader.lock"), fcntl.LOCK_EX)
+            fcntl.flock(self._lockfile(".writer.lock"), fcntl.LOCK_EX)
+        except OSError as e:
+            logging.warning("history: could not take over the log: %s", e)
+            return
+        with self._lock:
+            if self._writer_pid != os.getpid():
+                self._become_writer()
+
+    def _elect(self) -> bool:
+        """No poll leader: True if this process holds .writer.lock and records."""
+        if fcntl is None:
+            self._become_writer()
+            return True
+        if self._leader_pid == os.getpid():
+            return False        # spooled until _take_over() has the lock
+        try:
+            if self._led_elsewhere():
+                return False
+            fcntl.flock(self._lockfile(".writer.lock"), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self._become_writer()
+        return True
+
+    def _led_elsewhere(self) -> bool:
+        """True while another process's poller holds .leader.lock."""
+        leader = self._lockfile(".leader.lock")
+        try:
+            fcntl.flock(leader, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(leader, fcntl.LOCK_UN)
+        return False
+
+    def _lockfile(self, name: str):
+        pid = os.getpid()
+        held = self._locks.get(name)
+        if held is None or held[0] != pid:
+            # opened per process: a descriptor inherited over fork shares the lock
+            os.makedirs(self.folder, exist_ok=True)
+            held = self._locks[name] = (pid, open(os.path.join(self.folder, name), "a"))
+        return held[1]
+
+    def _become_writer(self):
+        """Seed _last from disk and start merging spools and flushing; under _lock."""
+        self._writer_pid = pid = os.getpid()
+        self._last.clear()      # what this process spooled, not what the log holds
+        self._seed()
+        self._record_spooled(self._drain())     # before anything newer is recorded
+        threading.Thread(target=self._write_loop, args=(pid,), name="history-write",
+                         daemon=True).start()
+
+    def _seed(self):
+        """Last recorded fields per id, from the newest sealed and the open segment."""
+        paths = [s.path for s in sorted(self._segments(), key=lambda s: s.t0)[-1:]]
+        if os.path.isdir(self.folder) and self._open_path():
+            paths.append(self._open_path())
+        for path in paths:
+            try:
+                with (gzip.open if path.endswith(".gz") else open)(path, "rt",
+                                                                   encoding="utf-8") as f:
+                    for line in f:
+                        _, eid, fields = json.loads(line)
+                        self._last[eid] = {**self._last.pop(eid, {}), **fields}
+            except (OSError, ValueError) as e:
+                logging.warning("history: could not read %s to seed states: %s", path, e)
+        if self._last:
+            logging.info("history: recording in pid %d, %d event states seeded",
+                         os.getpid(), len(self._last))
+
+    def _write_loop(self, pid):
+        while self._writer_pid == pid:
+            time.sleep(FLUSH_DELAY)
+            if fcntl is not None:
+                if self._leader_pid != pid and self._led_elsewhere():
+                    self._step_down()
+                    return
+                records = self._drain()
+                with self._lock:
+                    self._record_spooled(records)
+            self.flush()
+
+    def _step_down(self):
+        """Fallback writer: a poll leader has appeared, hand the log over."""
+        with self._lock:
+            self._writer_pid = None     # from here on this process spools
+            self._last.clear()
+        self.flush()
+        fcntl.flock(self._lockfile(".writer.lock"), fcntl.LOCK_UN)
+        logging.info("history: poll leader started, pid %d stops recording", os.getpid())
+
+    def _drain(self) -> list:
+        """Writer: empty every spool file, oldest record first; deletes those of exited processes."""
+        try:
+            names = [n for n in os.listdir(self.folder) if n.startswith("spool-")]
+        except FileNotFoundError:
+            return []
+        records = []
+        for name in names:
+            path = os.path.join(self.folder, name)
+            try:
+                with open(path, "r+", encoding="utf-8") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    lines = f.read().splitlines()
+                    f.truncate(0)
+                    if not _alive(int(name[len("spool-"):-len(".jsonl")])):
+                        os.unlink(path)
+            except (OSError, ValueError) as e:
+                logging.warning("history: could not merge %s: %s", name, e)
+                continue
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue    # cut short by a crash mid-write
+        records.sort(key=lambda r: r[0])
+        return records
+
+    def _record_spooled(self, records):
+        for t, eid, fields in records:
+            self._record(t, ((eid, fields),))
+
+    def observe_events(self, events, now=None):
+        self.observe(((ev.id, event_fields(ev)) for ev in events), now)
+
+    def observe_matchups(self, matchups, now=None):
+        self.observe(((f"fantasy-{m['id']}", matchup_fields(m)) for m in matchups), now)
+
+    def flush(self):
+        """Append the queued records to the open segment; seal it once full."""
+        with self._lock:
+            queue, self._queue = self._queue, []
+        if not queue:
+            return
+        with self._io:
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                queue.sort(key=lambda r: r[0])      # merged spool records may be older
+                path = self._open_path() or os.path.join(self.folder, f"{queue[0][0]}.log")
+                t0 = _t0(path)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(to_json([t - t0, eid, changed]) + "\n"
+                                    for t, eid, changed in queue))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logging.warning("history write failed, %d records dropped: %s", len(queue), e)
+                return
+            if os.path.getsize(path) >= SEGMENT_BYTES:
+                try:
+                    self._seal(path)
+                except OSError as e:    # the open segment stays as it is; retried next flush
+                    logging.warning("history seal of %s failed: %s", path, e)
+
+    def _open_path(self):
+        logs = sorted((n for n in os.listdir(self.folder) if n.endswith(".log")), key=_t0)
+        return os.path.join(self.folder, logs[-1]) if logs else None
+
+    def _seal(self, path):
+        t0, ids, t1 = _t0(path), set(), 0
+        with open(path, "rb") as f:
+            data = f.read()
+        for line in data.splitlines():
+            dt, eid, _ = json.loads(line)
+            ids.add(eid)
+            t1 = max(t1, t0 + dt)
+        _write_atomic(path + ".gz", gzip.compress(data, compresslevel=6, mtime=0), self.folder)
+        index = {"t0": t0, "t1": t1, "ids": sorted(ids)}
+        _write_atomic(path + ".idx", to_json(index).encode(), self.folder)
+        os.unlink(path)
+        logging.info("history: sealed %s (%d events, %.0f KiB → %.0f KiB)", os.path.basename(path),
+                     len(ids), len(data) / 1024, os.path.getsize(path + ".gz") / 1024)
+        self._evict()
+
+    def _evict(self):
+        segments = sorted(self._segments(), key=lambda s: s.t0)
+        total = sum(s.size for s in segments)
+        while segments and total > self.budget:
+            old = segments.pop(0)
+            total -= old.size
+            for p in (old.path, old.path[:-len(".gz")] + ".idx"):
+                try:
+                    os.unlink(p)
+                except FileNotFoundError:
+                    pass
+            with self._index:
+                self._sealed.pop(old.path, None)
+
+    # ---- querying
+    def _segments(self) -> list:
+        """Sealed segments on disk, their indexes read once and then cached."""
+        try:
+            names = set(os.listdir(self.folder))
+        except FileNotFoundError:
+            return []
+        with self._index:
+            return self._load_indexes(names)
+
+    def _load_indexes(self, names) -> list:
+        out = []
+        for name in names:
+            if not name.endswith(".log.idx"):
+                continue
+            path = os.path.join(self.folder, name[:-len(".idx")] + ".gz")
+            seg = self._sealed.get(path)
+            if seg is None:
+                try:
+                    with open(os.path.join(self.folder, name), encoding="utf-8") as f:
+                        index = json.load(f)
+                    seg = _Segment(path, index["t0"], index["t1"], frozenset(index["ids"]),
+                                   os.path.getsize(path))
+                except (OSError, ValueError, KeyError):
+                    continue        # half-written or already evicted
+                self._sealed[path] = seg
+            out.append(seg)
+        for path in set(self._sealed) - {s.path for s in out}:
+            del self._sealed[path]
+        return out
+
+    def query(self, event=None, since=0.0, until=None, limit=QUERY_LIMIT):
+        """
+        Recorded changes, oldest first, as (epoch, id, fields) tuples: those
+        of `event` (every event if None) between `since` and `until`.
+        Returns (changes, truncated).
+        """
+        until = until if until is not None else float("inf")
+        out = []
+
+        def scan(lines, t0):
+            needle = json.dumps(event) if event else None
+            for line in lines:
+                if needle and needle not in line:
+                    continue
+                dt, eid, fields = json.loads(line)
+                if (event is None or eid == event) and since <= t0 + dt <= until:
+                    out.append((t0 + dt, eid, fields))
+                    if len(out) > limit:
+                        return True
+            return False
+
+        for seg in sorted(self._segments(), key=lambda s: s.t0):
+            if seg.t1 < since or seg.t0 > until or (event and event not in seg.ids):
+                continue
+            try:
+                with gzip.open(seg.path, "rt", encoding="utf-8") as f:
+                    if scan(f, seg.t0):
+                        return out[:limit], True
+            except OSError:
+                continue            # evicted while we were reading
+        path = self._open_path() if os.path.isdir(self.folder) else None
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    if scan(f, _t0(path)):
+                        return out[:limit], True
+            except FileNotFoundError:
+                pass                # sealed in the meantime; its records are in a segment now
+        with self._lock:
+            queued = list(self._queue)
+        for t, eid, fields in queued:
+            if (event is None or eid == event) and since <= t <= until:
+                out.append((t, eid, fields))
+        return out[:limit], len(out) > limit
+
+
+def _t0(path: str) -> int:
+    """Start epoch of a segment, from its file name (<epoch>.log[.gz])."""
+    return int(os.path.basename(path).split(".")[0])
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _write_atomic(path: str, data: bytes, folder: str):
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".history-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+
+history = HistoryLog()
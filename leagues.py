@@ -0,0 +1,15 @@
+# Display names of the sports_data.LEAGUES registry, in registry order.
+# Kept apart so code that only needs the names (display profiles) can run
+# without importing sports_data, whose parsers, HTTP session and fetch pool
+# only the sports backend needs. sports_data checks the two agree.
+LEAGUE_NAMES = (
+    "NFL",
+    "NCAA Football",
+    "NBA",
+    "NCAA Basketball",
+    "MLB",
+    "ATP Men's Singles",
+    "WTA Women's Singles",
+    "NHL",
+    "Formula 1",
+)
@@ -0,0 +1,161 @@
+import base64, hashlib, io, logging, os, tempfile, threading
+from collections import OrderedDict
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# Pillow (in requirements.txt) downscales logos; without it they are served
+# as fetched. Imported on the first downscale, not at startup; False until
+# then, None if not installed.
+Image = False
+
+
+def _pil():
+    global Image
+    if Image is False:
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+    return Image
+
+LOGO_DIR      = os.getenv("TICKER_LOGOS",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       "cache", "logos"))
+LOGO_PX       = 96                  # 2× the 48px .logo box in style.css
+LOGO_MAX_MB   = 32                  # on-disk budget before the LRU evicts
+LOGO_HOSTS    = ("espncdn.com",)    # only these hosts (and subdomains) are proxied
+LOGO_MAX_AGE  = 30 * 24 * 3600      # Cache-Control max-age for /logo responses
+
+
+def _allowed(url: str) -> bool:
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    return parts.scheme == "https" and any(
+        host == h or host.endswith("." + h) for h in LOGO_HOSTS)
+
+
+@lru_cache(maxsize=4096)
+def proxy_url(url: str) -> str:
+    """
+    Rewrite a CDN image URL to this server's /logo/<key> endpoint. Memoized:
+    every parse rebuilds the same few hundred logo URLs each poll.
+    """
+    if not url or not _allowed(url):
+        return url
+    key = base64.urlsafe_b64encode(url.encode()).rstrip(b"=").decode()
+    return f"/logo/{key}"
+
+
+def url_for_key(key: str) -> str | None:
+    """Inverse of proxy_url(); None for keys that don't decode to an allowed URL."""
+    try:
+        url = base64.urlsafe_b64decode(key + "=" * (-len(key) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return url if _allowed(url) else None
+
+
+def _downscale(data: bytes) -> bytes:
+    """Shrink to fit LOGO_PX × LOGO_PX, keeping the image format."""
+    pil = _pil()
+    if pil is None:
+        return data
+    try:
+        with pil.open(io.BytesIO(data)) as img:
+            if max(img.size) <= LOGO_PX:
+                return data
+            fmt = img.format or "PNG"
+            img.thumbnail((LOGO_PX, LOGO_PX))
+            out = io.BytesIO()
+            img.save(out, format=fmt)
+            return out.getvalue()
+    except Exception as e:          # not an image Pillow understands; pass through
+        logging.debug("logo downscale skipped: %s", e)
+        return data
+
+
+class LogoCache:
+    """
+    Images fetched once from the CDN, downscaled to LOGO_PX and kept on disk.
+    Bounded to LOGO_MAX_MB; least recently served files are evicted first.
+    """
+
+    def __init__(self, folder=LOGO_DIR, max_bytes=LOGO_MAX_MB * 1024 * 1024):
+        self.folder    = folder
+        self.max_bytes = max_bytes
+        self._lock     = threading.Lock()
+        self._files    = OrderedDict()      # file name → size, oldest use first
+        self._fetching = {}                 # file name → lock held while one request fetches it
+        self._total    = 0
+        self._scan()
+
+    def _scan(self):
+        try:
+            entries = sorted(os.scandir(self.folder), key=lambda e: e.stat().st_mtime)
+        except FileNotFoundError:
+            return
+        for e in entries:
+            if e.is_file() and not e.name.startswith("."):
+                self._files[e.name] = e.stat().st_size
+                self._total += e.stat().st_size
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def get(self, url: str) -> bytes:
+        """
+        Image bytes for `url`, from disk or fetched, resized and stored.
+        Concurrent misses for one image wait for a single fetch.
+        """
+        name = hashlib.sha1(url.encode()).hexdigest() + os.path.splitext(urlsplit(url).path)[1]
+        data = self._read(name)
+        if data is not None:
+            return data
+
+        with self._lock:
+            flight = self._fetching.setdefault(name, threading.Lock())
+        with flight:
+            try:
+                data = self._read(name)     # stored by the fetch we waited for
+                if data is None:
+                    from sports_data import FETCH_TIMEOUT, SESSION
+                    resp = SESSION.get(url, timeout=FETCH_TIMEOUT)
+                    resp.raise_for_status()
+                    data = _downscale(resp.content)
+                    self._store(name, data)
+                return data
+            finally:
+                with self._lock:
+                    if self._fetching.get(name) is flight:
+                        del self._fetching[name]
+
+    def _read(self, name: str) -> bytes | None:
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+                try:
+                    with open(self._path(name), "rb") as f:
+                        return f.read()
+                except FileNotFoundError:
+                    self._total -= self._files.pop(name)
+        return None
+
+    def _store(self, name: str, data: bytes):
+        os.makedirs(self.folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.folder, prefix=".logo-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+        with self._lock:
+            self._total += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            while self._total > self.max_bytes and len(self._files) > 1:
+                old, size = self._files.popitem(last=False)
+                self._total -= size
+                try:
+                    os.unlink(self._path(old))
+                except FileNotFoundError:
+                    pass
+
+
+logos = LogoCache()
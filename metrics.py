@@ -0,0 +1,222 @@
+import json, logging, os, tempfile, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Minimal Prometheus text-format instrumentation: counters, gauges and
+# fixed-bucket histograms keyed by label values. Each update is a dict
+# lookup and a few additions under a per-metric lock, cheap enough to
+# leave on permanently.
+#
+# Under gunicorn (TICKER_SHARED set, see gunicorn.conf.py) every worker has
+# its own registry, so each one also dumps its samples to SHARE_DIR every
+# SHARE_INTERVAL and /metrics, whichever worker serves it, renders all
+# live workers' samples with a `pid` label: the polling worker's fetch and
+# parse series no longer appear and vanish between scrapes.
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 15)
+BYTES_BUCKETS   = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+
+_REGISTRY = []
+
+_SHARED        = os.getenv("TICKER_SHARED")
+SHARE_DIR      = os.path.join(os.path.dirname(_SHARED), "ticker-metrics") if _SHARED else None
+SHARE_INTERVAL = 5      # seconds between a worker's dumps; 3 missed ones mark it gone
+_sharing_pid   = None
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _labels(names, values, extra="") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels=()):
+        self.name   = name
+        self.doc    = doc
+        self.labels = tuple(labels)
+        self._lock  = threading.Lock()
+        self._data  = {}
+        _REGISTRY.append(self)
+
+    def data(self) -> dict:
+        """Copy of the samples: label values → value (bucket counts for histograms)."""
+        with self._lock:
+            return {key: list(v) if isinstance(v, list) else v for key, v in self._data.items()}
+
+    def render(self, processes=None):
+        """
+        Exposition lines for this process's samples, or with `processes`
+        (pid → data()) for each of those, labelled with its pid.
+        """
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} {self.kind}"
+        if processes is None:
+            for key, value in sorted(self.data().items()):
+                yield from self._samples(self.labels, key, value)
+            return
+        names = self.labels + ("pid",)
+        for pid, data in sorted(processes.items()):
+            for key, value in sorted(data.items()):
+                yield from self._samples(names, key + (str(pid),), value)
+
+    def _samples(self, names, key, value):
+        yield f"{self.name}{_labels(names, key)} {_num(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._data[labels] = self._data.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._data[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._data.get(labels)
+            if counts is None:
+                # one slot per bucket, +Inf, then sum
+                counts = self._data[labels] = [0] * (len(self.buckets) + 2)
+            counts[i] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def _samples(self, names, key, counts):
+        total = 0
+        for bound, n in zip(self.buckets + ("+Inf",), counts):
+            total += n
+            le = f'le="{bound}"'
+            yield f"{self.name}_bucket{_labels(names, key, le)} {total}"
+        yield f"{self.name}_sum{_labels(names, key)} {_num(counts[-1])}"
+        yield f"{self.name}_count{_labels(names, key)} {total}"
+
+
+def render() -> str:
+    """
+    Every registered metric in Prometheus text exposition format; with
+    SHARE_DIR, every live worker's samples (see share()).
+    """
+    processes = _gather() if SHARE_DIR else None
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render(processes and {
+            pid: data.get(metric.name, {}) for pid, data in processes.items()}))
+    return "\n".join(lines) + "\n"
+
+
+# ─────────────────────────── multi-process sharing
+def share():
+    """Start dumping this process's samples to SHARE_DIR (once per process)."""
+    global _sharing_pid
+    if SHARE_DIR is None or _sharing_pid == os.getpid():
+        return
+    _sharing_pid = os.getpid()
+
+    def run():
+        while True:
+            _dump()
+            time.sleep(SHARE_INTERVAL)
+
+    threading.Thread(target=run, name="metrics-share", daemon=True).start()
+
+
+def _dump():
+    doc = {m.name: [[list(key), value] for key, value in m.data().items()] for m in _REGISTRY}
+    tmp = None
+    try:
+        os.makedirs(SHARE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=SHARE_DIR, prefix=".metrics-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(doc, f)
+        os.replace(tmp, os.path.join(SHARE_DIR, f"{os.getpid()}.json"))
+    except OSError as e:
+        logging.warning("could not share metrics in %s: %s", SHARE_DIR, e)
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _gather() -> dict:
+    """pid → {metric name → data()} for this process and every worker still dumping."""
+    pid = os.getpid()
+    out = {pid: {m.name: m.data() for m in _REGISTRY}}
+    try:
+        names = os.listdir(SHARE_DIR)
+    except FileNotFoundError:
+        return out
+    for name in names:
+        other, ext = os.path.splitext(name)
+        if ext != ".json" or not other.isdigit() or int(other) == pid:
+            continue
+        path = os.path.join(SHARE_DIR, name)
+        try:
+            if time.time() - os.stat(path).st_mtime > 3 * SHARE_INTERVAL:
+                os.unlink(path)     # that worker has exited
+                continue
+            with open(path, encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            continue
+        out[int(other)] = {metric: {tuple(key): value for key, value in samples}
+                           for metric, samples in doc.items()}
+    return out
+
+
+# ─────────────────────────── ticker metrics
+FETCH_SECONDS  = Histogram("ticker_fetch_seconds",
+                           "ESPN scoreboard request latency, retries included", ["league"])
+FETCH_BYTES    = Histogram("ticker_fetch_bytes", "ESPN scoreboard body size",
+                           ["league"], buckets=BYTES_BUCKETS)
+FETCH_ERRORS   = Counter("ticker_fetch_errors_total",
+                         "Failed or skipped league fetches", ["league", "reason"])
+CACHE_RESULTS  = Counter("ticker_response_cache_total",
+                         "Scoreboard fetch outcome: not_modified / same_body / parsed",
+                         ["league", "result"])
+DECODE_SECONDS = Histogram("ticker_decode_seconds", "Scoreboard JSON decode time", ["league"])
+PARSE_SECONDS  = Histogram("ticker_parse_seconds", "League parser run time", ["league"])
+EVENTS         = Gauge("ticker_events", "Events in the league's latest slate", ["league"])
+CRAWL_SECONDS  = Histogram("ticker_crawl_seconds", "get_all_events wall time")
+ENCODE_SECONDS = Histogram("ticker_encode_seconds", "Snapshot /data body serialization time")
+FANTASY_SECONDS = Histogram("ticker_fantasy_seconds",
+                            "Fantasy espn_api calls", ["call"])
+FANTASY_ERRORS = Counter("ticker_fantasy_errors_total", "Failed fantasy refreshes")
+FANTASY_SKIPPED = Counter("ticker_fantasy_skipped_total",
+                          "Fantasy refreshes skipped: no rostered NFL game moving")
+HTTP_SECONDS   = Histogram("ticker_http_request_seconds",
+                           "Flask handler latency", ["endpoint", "status"])
+HTTP_BYTES     = Counter("ticker_http_response_bytes_total",
+                         "Response bytes sent (non-streamed)", ["endpoint"])
@@ -0,0 +1,131 @@
+import gzip, json
+from dataclasses import dataclass
+
+try:                        # optional: `pip install brotli` for br responses
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# ─────────────────────────── event types
+# Parsers build these once per distinct scoreboard body; the response cache,
+# poller snapshots and SSE deltas all share the same instances, so treat them
+# as immutable once constructed.
+
+@dataclass(slots=True)
+class Event:
+    """One head-to-head game or match (team sports, tennis)."""
+    id:        str
+    league:    str
+    sport:     str
+    away:      str
+    away_logo: str
+    home:      str
+    home_logo: str
+    score:     str
+    status:    str
+    winner:    str | None
+    ongoing:   bool
+    state:     str          # pre | in | post
+    start:     str          # ESPN ISO timestamp
+    away_abbr: str = ""     # team abbreviation ("KC"); empty for tennis
+    home_abbr: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "id":        self.id,
+            "league":    self.league,
+            "sport":     self.sport,
+            "away":      self.away,
+            "away_logo": self.away_logo,
+            "home":      self.home,
+            "home_logo": self.home_logo,
+            "score":     self.score,
+            "status":    self.status,
+            "winner":    self.winner,
+            "ongoing":   self.ongoing,
+            "state":     self.state,
+            "start":     self.start,
+            "away_abbr": self.away_abbr,
+            "home_abbr": self.home_abbr,
+        }
+
+
+@dataclass(slots=True)
+class FormulaOneSession:
+    """One F1 session (FP1 … Race) with its running order."""
+    id:      str
+    league:  str
+    sport:   str
+    session: str
+    field:   list           # [{"pos", "name", "flag"}, …] in running order
+    status:  str
+    ongoing: bool
+    state:   str
+    start:   str
+    winner:  None = None    # styling flag unused
+
+    def to_dict(self) -> dict:
+        return {
+            "id":      self.id,
+            "league":  self.league,
+            "sport":   self.sport,
+            "session": self.session,
+            "field":   self.field,
+            "status":  self.status,
+            "ongoing": self.ongoing,
+            "state":   self.state,
+            "start":   self.start,
+            "winner":  self.winner,
+        }
+
+
+def event_from_dict(d: dict):
+    """Inverse of to_dict(), for events read back from the snapshot cache."""
+    return FormulaOneSession(**d) if "field" in d else Event(**d)
+
+
+# ─────────────────────────── encoding
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False,
+                            default=lambda o: o.to_dict())
+
+
+def to_json(obj) -> str:
+    """Compact JSON; Event / FormulaOneSession values encode via to_dict()."""
+    return _encoder.encode(obj)
+
+
+class EncodedBody:
+    """
+    A JSON document serialized once, with compressed variants built on first
+    request and kept for the life of the body.
+    """
+    __slots__ = ("raw", "_variants")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._variants = {}
+
+    @classmethod
+    def of(cls, obj) -> "EncodedBody":
+        return cls(to_json(obj).encode())
+
+    def negotiate(self, accept) -> str:
+        """Best content-coding for a werkzeug Accept-Encoding header."""
+        if brotli and accept["br"]:
+            return "br"
+        if accept["gzip"]:
+            return "gzip"
+        return "identity"
+
+    def get(self, coding: str) -> bytes:
+        if coding == "identity":
+            return self.raw
+        data = self._variants.get(coding)
+        if data is None:
+            if coding == "br":
+                data = brotli.compress(self.raw, quality=5)
+            else:
+                data = gzip.compress(self.raw, compresslevel=6, mtime=0)
+            self._variants[coding] = data
+        return data
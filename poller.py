@@ -0,0 +1,574 @@
+import json, logging, os, tempfile, threading, time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import cached_property
+from datetime import datetime
+from itertools import chain
+from types import MappingProxyType
+
+import metrics
+from f1_tracker import SessionTracker, field_delta
+from history_log import history as default_history
+from models import EncodedBody, event_from_dict, to_json
+from snapshot_store import store as default_store
+from sports_data import GRACE_HOURS, HEALTH, LEAGUES, CRAWL_DEADLINE, TZ, TimeContext, fetch_league
+
+try:                        # Unix only; elsewhere every process polls on its own
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# refresh cadence per league, picked from the state of its latest slate
+LIVE_INTERVAL    = 20          # a game is in progress
+PREGAME_MIN      = 60          # next start is imminent (or overdue)
+PREGAME_MAX      = 15 * 60     # next start is further out
+IDLE_INTERVAL    = 2 * 3600    # only finals left, or nothing scheduled
+SCHEDULED_MAX    = 6 * 3600    # longest sleep when a prefetched schedule says nothing is on
+# after a failed refresh the league's LeagueHealth picks the delay
+# (exponential backoff with jitter, or until its circuit breaker closes)
+
+DELTA_FIELDS  = ("score", "status", "winner", "ongoing", "state", "field")
+DELTA_HISTORY = 64             # deltas kept for clients catching up
+
+# /data?per=&cols=&page=: pre-ordered pages of `per` card slots in a grid
+# of `cols` columns. League headers and F1 sessions span a whole row; an
+# F1 session's two-column running order is F1_ROWS rows tall
+F1_ROWS = 3
+
+# stateful post-processing of a league kind's parsed events between polls
+TRACKERS = {"f1": SessionTracker}
+
+# multi-process serving (gunicorn.conf.py sets TICKER_SHARED): the process
+# holding an flock on SHARED_PATH + ".lock" polls ESPN and writes every
+# snapshot to SHARED_PATH; the others follow that file instead of polling
+SHARED_PATH     = os.getenv("TICKER_SHARED")
+FOLLOW_INTERVAL = 1            # seconds between a follower's checks
+
+
+def _epoch(iso: str) -> float:
+    return datetime.fromisoformat(iso.replace("Z", "+00:00")).timestamp()
+
+
+def _next_boundary(now: float) -> float:
+    """Next instant a date window changes: midnight, or the end of the grace period."""
+    ctx = TimeContext(datetime.fromtimestamp(now, TZ))
+    grace_end = ctx.day_start + GRACE_HOURS * 3600
+    return grace_end if grace_end > now else ctx.day_end
+
+
+def next_interval(events, now=None, timeline=None, live=LIVE_INTERVAL) -> float:
+    """
+    Seconds until a league should be polled again, given its parsed events:
+    • any `ongoing` game         → `live` (LIVE_INTERVAL unless the league
+                                   sets its own `live_interval`)
+    • `pre` games still to come  → time to the first start, clamped to
+                                   [PREGAME_MIN, PREGAME_MAX]
+    • only `post` games / empty  → IDLE_INTERVAL
+    With a prefetched schedule `timeline`, anything not live sleeps until
+    the next scheduled start or date-window change (at least PREGAME_MIN,
+    at most SCHEDULED_MAX) instead.
+    """
+    now = now or time.time()
+    if any(ev.ongoing for ev in events):
+        return live
+    starts = [_epoch(ev.start) for ev in events if ev.state == "pre"]
+    if timeline is not None:
+        wake = min(filter(None, (min(starts, default=None), timeline.next_start(now),
+                                 _next_boundary(now))))
+        return min(max(wake - now, PREGAME_MIN), SCHEDULED_MAX)
+    if starts:
+        return min(max(min(starts) - now, PREGAME_MIN), PREGAME_MAX)
+    return IDLE_INTERVAL
+
+
+def diff_events(old, new) -> dict:
+    """
+    Per-event changes between two event lists, keyed by event `id`:
+    `changed` carries only the DELTA_FIELDS that differ, `added` whole
+    events and `removed` bare ids. An F1 `field` is narrowed to the driver
+    rows that moved (see f1_tracker.field_delta).
+    """
+    before = {ev.id: ev for ev in old}
+    after  = {ev.id: ev for ev in new}
+    changed = []
+    for eid, ev in after.items():
+        prev = before.get(eid)
+        if prev is None or prev is ev:
+            continue
+        fields = {k: getattr(ev, k) for k in DELTA_FIELDS
+                  if hasattr(ev, k) and getattr(ev, k) != getattr(prev, k, None)}
+        if "field" in fields:
+            fields.update(field_delta(prev.field, fields.pop("field")))
+        if fields:
+            changed.append({"id": eid, **fields})
+    return {
+        "changed": changed,
+        "added":   [ev for eid, ev in after.items() if eid not in before],
+        "removed": [eid for eid in before if eid not in after],
+    }
+
+
+def paginate(events, per: int, cols: int = 2) -> list:
+    """
+    Split ordered events into pages that fit `per` card slots of a `cols`
+    column grid (never empty), laid out as the client does: a header row
+    opens each page and each league run, and a run's last row is used up
+    even when it is only partly filled.
+    """
+    rows = max(per // cols, 1)
+    pages, page = [], []
+    used = filled = 0           # rows taken on this page; cards in its open row
+    for ev in events:
+        add, cells = _placed(ev, page[-1] if page else None, filled, cols, rows)
+        if page and used + add > rows:
+            pages.append(page)
+            page, used = [], 0
+            add, cells = _placed(ev, None, 0, cols, rows)
+        page.append(ev)
+        used, filled = used + add, cells
+    if page or not pages:
+        pages.append(page)
+    return pages
+
+
+def _placed(ev, prev, filled: int, cols: int, rows: int) -> tuple[int, int]:
+    """(rows `ev` adds after `prev` on a page, cards then in the open row)."""
+    add = 0
+    if prev is None or ev.league != prev.league:
+        add, filled = 1, 0      # header row; the previous run's open row stays used
+    if getattr(ev, "field", None) is not None:
+        return add + min(F1_ROWS, rows), 0
+    return add + (filled == 0), (filled + 1) % cols
+
+
+def _alert(states) -> str | None:
+    return next((f"{name} fetch failed" for name, st in states.items() if st.error), None)
+
+
+def _next_up(states) -> list:
+    """The next scheduled game of each league with nothing on today."""
+    return [st.upcoming for st in states.values() if st.upcoming and not st.events]
+
+
+def _favorite(ev, favorites) -> bool:
+    return (getattr(ev, "home", "").lower() in favorites
+            or getattr(ev, "away", "").lower() in favorites)
+
+
+# ─────────────────────────── snapshot types
+@dataclass(frozen=True)
+class LeagueState:
+    events:  tuple = ()
+    updated: float | None = None   # epoch of last successful refresh
+    error:   str | None = None     # set while the latest refresh is failing
+    due:     float | None = None   # epoch of the next scheduled refresh
+    stale:   bool = False          # events are not from the latest attempt
+    health:  dict | None = None    # LeagueHealth.to_dict() after the latest attempt
+    upcoming: object = None        # next scheduled game outside `events`, if known
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Immutable view of every league as of `generated`. The poller swaps in a
+    new Snapshot after each refresh; readers never see a half-built one.
+    The /data body is serialized (and compressed) at most once per Snapshot
+    and view; its ages are as of `generated`, and handlers add an HTTP Age
+    header.
+
+    A view is a (league names, favorite teams) pair: only those leagues, in
+    that order, with favorite teams' games first within each league. Every
+    display profile with the same view shares one body.
+    """
+    version:   int
+    generated: float
+    events:    tuple
+    alert:     str | None
+    leagues:   MappingProxyType
+    _views:    dict = field(default_factory=dict, repr=False, compare=False)
+
+    def view_events(self, view) -> list:
+        names, favorites = view
+        events = []
+        for name in names:
+            league = self.leagues[name].events if name in self.leagues else ()
+            if favorites:
+                league = sorted(league, key=lambda ev: not _favorite(ev, favorites))
+            events.extend(league)
+        return events
+
+    def ordered(self, view=None) -> list:
+        """Events for paging: live games first, both groups in league (view) order."""
+        events = self.events if view is None else self.view_events(view)
+        return sorted(events, key=lambda ev: not ev.ongoing)
+
+    def payload(self, now=None, view=None, events=None) -> dict:
+        """The /data document; `events` replaces the view's full list (one page)."""
+        now = now or time.time()
+        if view is None:
+            leagues, alert = self.leagues, self.alert
+            events = self.events if events is None else events
+        else:
+            leagues = {name: self.leagues[name] for name in view[0] if name in self.leagues}
+            alert = _alert(leagues)
+            events = self.view_events(view) if events is None else events
+        dues = [st.due for st in leagues.values() if st.due]
+        doc = {
+            "version": self.version,
+            "events":  [ev.to_dict() for ev in events],
+            "alert":   alert,
+            "next_up": [ev.to_dict() for ev in _next_up(leagues)],
+            "refresh": max(int(min(dues) - now), 1) if dues else PREGAME_MIN,
+            "leagues": {
+                name: {
+                    "updated": st.updated,
+                    "age":     int(now - st.updated) if st.updated else None,
+                    "next":    max(int(st.due - now), 0) if st.due else None,
+                    "error":   st.error,
+                    "stale":   st.stale,
+                    "health":  st.health,
+                }
+                for name, st in leagues.items()
+            },
+        }
+        if view is not None and view[1]:
+            doc["favorites"] = sorted(view[1])
+        return doc
+
+    @cached_property
+    def body(self) -> EncodedBody:
+        with metrics.ENCODE_SECONDS.time():
+            return EncodedBody.of(self.payload(self.generated))
+
+    def view(self, view=None) -> EncodedBody:
+        """The /data body for `view` (None: every league, registry order)."""
+        if view is None:
+            return self.body
+        body = self._views.get(view)
+        if body is None:
+            with metrics.ENCODE_SECONDS.time():
+                body = self._views[view] = EncodedBody.of(self.payload(self.generated, view))
+        return body
+
+    def page(self, view, per: int, cols: int, n: int) -> tuple[int, EncodedBody]:
+        """
+        (page number, body) for page `n` of the view, `per` card slots in
+        `cols` columns each; `n` wraps around, so a display can keep
+        counting up. Each page is encoded once per Snapshot, like view().
+        """
+        pages = self._views.get(("pages", view, per, cols))
+        if pages is None:
+            pages = self._views[("pages", view, per, cols)] = paginate(
+                self.ordered(view), per, cols)
+        n %= len(pages)
+        body = self._views.get(("page", view, per, cols, n))
+        if body is None:
+            with metrics.ENCODE_SECONDS.time():
+                doc = self.payload(self.generated, view, pages[n])
+                doc.update(page=n, pages=len(pages), per=per, cols=cols)
+                body = self._views[("page", view, per, cols, n)] = EncodedBody.of(doc)
+        return n, body
+
+
+class _Delta:
+    """One league refresh's changes, encoded per view on first request."""
+    __slots__ = ("snapshot", "league", "delta", "views")
+
+    def __init__(self, snapshot: Snapshot, league: str, delta: dict):
+        self.snapshot = snapshot
+        self.league   = league
+        self.delta    = delta
+        self.views    = {}
+
+    def body(self, view=None) -> str | None:
+        """Serialized delta as `view` sees it; None if its league is not in the view."""
+        if view is not None and self.league not in view[0]:
+            return None
+        body = self.views.get(view)
+        if body is None:
+            snap = self.snapshot
+            if view is None:
+                states, extra = snap.leagues, {}
+            else:
+                states = {name: snap.leagues[name] for name in view[0] if name in snap.leagues}
+                # new games may land anywhere in a custom order; send the full order
+                extra = ({"order": [ev.id for ev in snap.view_events(view)]}
+                         if self.delta["added"] else {})
+            body = self.views[view] = to_json({
+                "version": snap.version,
+                "alert":   snap.alert if view is None else _alert(states),
+                "stale":   [name for name, st in states.items() if st.stale],
+                "next_up": _next_up(states),
+                **self.delta, **extra,
+            })
+        return body
+
+
+# ─────────────────────────── poller
+class ScoreboardPoller:
+    """
+    Refreshes each LEAGUES entry on its own daemon thread and publishes an
+    immutable Snapshot that request handlers can read without any I/O.
+    Each league's next refresh is chosen by next_interval() from the slate
+    it just returned. A failed refresh keeps the league's last good events,
+    raises an alert and is retried when the league's LeagueHealth says so.
+
+    Leagues start from the last good data in the snapshot store (flagged
+    `stale` until refreshed) so the first request after a restart is served
+    straight from disk; changed slates are written back to the store.
+
+    With `shared` set, only one process (the flock holder) polls; the others
+    mirror the league states it writes there and take over if it exits.
+
+    With a `schedule` (schedule.Schedule), the polling process also keeps
+    every league's upcoming timeline: idle leagues sleep until their next
+    start, and leagues with nothing on today carry their next game.
+    """
+
+    def __init__(self, leagues=LEAGUES, store=default_store, shared=SHARED_PATH,
+                 schedule=None, history=default_history):
+        self.leagues   = leagues
+        self.store     = store
+        self.history   = history
+        self.shared    = shared
+        self.schedule  = schedule
+        self._wake     = {name: threading.Event() for name in leagues}
+        self._trackers = {name: TRACKERS[cfg["kind"]]() for name, cfg in leagues.items()
+                          if cfg.get("kind") in TRACKERS}
+        self._lockfile = None
+        self._followed = {}    # league → raw state last read from `shared`
+        self._share_lock = threading.Lock()
+        self._shared_version = -1
+        self._states   = {name: self._restore(name) for name in leagues}
+        self._lock     = threading.Lock()
+        self._changed  = threading.Condition(self._lock)
+        self._deltas   = deque(maxlen=DELTA_HISTORY)   # _Delta, oldest first
+        self._dropped  = 0     # newest version whose delta fell off _deltas
+        self._stop     = threading.Event()
+        self._ready    = threading.Event()
+        self._threads  = []
+        self._snapshot = self._build(0)
+        if any(st.updated for st in self._states.values()):
+            self._ready.set()
+
+    def _restore(self, name: str) -> LeagueState:
+        saved = self.store.league(name) if self.store else None
+        if not saved:
+            return LeagueState()
+        updated, events = saved
+        try:
+            return LeagueState(tuple(map(event_from_dict, events)), updated, stale=True)
+        except TypeError as e:          # stored by an incompatible version
+            logging.warning("dropping cached %s events: %s", name, e)
+            return LeagueState()
+
+    # ---- lifecycle
+    def start(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            if self._elect():
+                self._lead()
+            else:
+                t = threading.Thread(target=self._follow, name="poll-follow", daemon=True)
+                self._threads.append(t)
+                t.start()
+                logging.info("poller following %s (pid %d)", self.shared, os.getpid())
+
+    def _elect(self) -> bool:
+        """True if this process should poll ESPN itself."""
+        if not self.shared or fcntl is None:
+            return True
+        if self._lockfile is None:
+            os.makedirs(os.path.dirname(self.shared) or ".", exist_ok=True)
+            self._lockfile = open(self.shared + ".lock", "a")
+        try:
+            fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _lead(self):
+        for name in self.leagues:
+            t = threading.Thread(target=self._run, args=(name,),
+                                 name=f"poll-{name}", daemon=True)
+            self._threads.append(t)
+            t.start()
+        logging.info("poller started for %d leagues (pid %d)", len(self.leagues), os.getpid())
+        if self.history:
+            self.history.lead()
+        if self.schedule:
+            self.schedule.start(self.wake)
+
+    def wake(self, names=None):
+        """Refresh these leagues (default: all) now instead of at their due time."""
+        for name in names or self.leagues:
+            self._wake[name].set()
+
+    def stop(self):
+        self._stop.set()
+        if self.schedule:
+            self.schedule.stop()
+        self.wake()
+
+    # ---- readers
+    @property
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def wait_ready(self, timeout=CRAWL_DEADLINE) -> bool:
+        """Block until every league has reported at least once."""
+        return self._ready.wait(timeout)
+
+    def wait_deltas(self, since: int, timeout: float, view=None):
+        """
+        (version, serialized delta) pairs newer than version `since`,
+        blocking up to `timeout` for one to arrive; the body is None for
+        deltas outside `view`. Returns [] on timeout, or None when `since`
+        is too old to catch up and a full snapshot is needed.
+        """
+        with self._changed:
+            if since < self._dropped:
+                return None
+            if not self._deltas or self._deltas[-1].snapshot.version <= since:
+                self._changed.wait(timeout)
+                if since < self._dropped:
+                    return None
+            pending = [d for d in self._deltas if d.snapshot.version > since]
+        return [(d.snapshot.version, d.body(view)) for d in pending]
+
+    # ---- workers
+    def _run(self, name: str):
+        wake = self._wake[name]
+        while not self._stop.is_set():
+            state = self.refresh(name)
+            wake.wait(max(state.due - time.time(), 0))
+            wake.clear()
+
+    def refresh(self, name: str) -> LeagueState:
+        events, err = fetch_league(name)
+        tracker = self._trackers.get(name)
+        if tracker and not err:
+            events = tracker.update(events)
+        now = time.time()
+        health = HEALTH[name]
+        timeline = self.schedule and self.schedule.get(name)
+        live = self.leagues[name].get("live_interval", LIVE_INTERVAL)
+        with self._lock:
+            prev = self._states[name]
+            if err:
+                state = LeagueState(prev.events, prev.updated, err,
+                                    now + max(health.retry_in(now), 1), stale=True,
+                                    health=health.to_dict(), upcoming=prev.upcoming)
+            else:
+                upcoming = timeline and timeline.next_event(now, {ev.id for ev in events})
+                state = LeagueState(tuple(events), now, None,
+                                    now + next_interval(events, now, timeline, live),
+                                    health=health.to_dict(), upcoming=upcoming or None)
+            self._states[name] = state
+            prev_alert = self._snapshot.alert
+            self._snapshot = self._build(self._snapshot.version + 1)
+            changed = self._publish_delta(name, prev.events, state.events, prev_alert,
+                                          prev.stale != state.stale
+                                          or prev.upcoming != state.upcoming)
+            if not self._ready.is_set() and all(
+                    st.updated or st.error for st in self._states.values()):
+                self._ready.set()
+        if changed and not err and self.store:
+            self.store.save_league(name, now, state.events)
+        if changed and not err and self.history:
+            self.history.observe_events(state.events, now)
+        self._share(self._snapshot)
+        return state
+
+    # ---- multi-process sharing
+    def _share(self, snap: Snapshot):
+        """Leader: write the league states behind `snap` for follower processes."""
+        if self._lockfile is None:
+            return
+        doc = to_json({"version": snap.version,
+                       "leagues": {name: vars(st) for name, st in snap.leagues.items()}})
+        with self._share_lock:
+            if snap.version <= self._shared_version:
+                return          # a newer snapshot was already written
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.shared) or ".", prefix=".live-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(doc)
+            os.replace(tmp, self.shared)
+            self._shared_version = snap.version
+
+    def _follow(self):
+        stamp = None
+        while not self._stop.is_set():
+            if self._elect():
+                logging.info("poller leader gone, taking over")
+                with self._lock:
+                    self._lead()
+                return
+            try:
+                mtime = os.stat(self.shared).st_mtime_ns
+                if mtime != stamp:
+                    stamp = mtime
+                    self._load_shared()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning("could not read shared snapshot %s: %s", self.shared, e)
+            self._stop.wait(FOLLOW_INTERVAL)
+
+    def _load_shared(self):
+        """Follower: adopt the leader's league states and publish their deltas."""
+        with open(self.shared, encoding="utf-8") as f:
+            doc = json.load(f)
+        updates = {}
+        for name, raw in doc["leagues"].items():
+            seen = self._followed.get(name)
+            if name not in self._states or raw == seen:
+                continue
+            events = (self._states[name].events if seen and seen["events"] == raw["events"]
+                      else tuple(map(event_from_dict, raw["events"])))
+            upcoming = raw.get("upcoming")
+            updates[name] = LeagueState(**{**raw, "events": events,
+                                           "upcoming": upcoming and event_from_dict(upcoming)})
+            self._followed[name] = raw
+        if not updates:
+            return
+        with self._lock:
+            prev_alert = self._snapshot.alert
+            previous = {name: self._states[name] for name in updates}
+            self._states.update(updates)
+            # never go backwards, even when a new leader restarts its count
+            self._snapshot = self._build(max(self._snapshot.version + 1, doc["version"]))
+            for name, state in updates.items():
+                prev = previous[name]
+                self._publish_delta(name, prev.events, state.events, prev_alert,
+                                    prev.stale != state.stale
+                                    or prev.upcoming != state.upcoming)
+            if not self._ready.is_set() and all(
+                    st.updated or st.error for st in self._states.values()):
+                self._ready.set()
+
+    def _publish_delta(self, name, old, new, prev_alert, force=False) -> bool:
+        """Queue the delta for SSE clients; True if any event changed."""
+        snap  = self._snapshot
+        delta = diff_events(old, new)
+        changed = any(delta.values())
+        if not changed and snap.alert == prev_alert and not force:
+            return False
+        if len(self._deltas) == self._deltas.maxlen:
+            self._dropped = self._deltas[0].snapshot.version
+        self._deltas.append(_Delta(snap, name, delta))
+        self._changed.notify_all()
+        return changed
+
+    def _build(self, version: int) -> Snapshot:
+        states = MappingProxyType(dict(self._states))
+        return Snapshot(
+            version   = version,
+            generated = time.time(),
+            events    = tuple(chain.from_iterable(st.events for st in states.values())),
+            alert     = _alert(states),
+            leagues   = states,
+        )
@@ -0,0 +1,151 @@
+import json, logging, os, tempfile, threading
+from dataclasses import dataclass, replace
+
+from leagues import LEAGUE_NAMES
+
+PROFILES_PATH  = os.getenv("TICKER_PROFILES",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                        "profiles.json"))
+# multi-process serving (TICKER_SHARED, see gunicorn.conf.py): /set_mode
+# switches go to a file next to the shared snapshot that every worker re-reads
+_SHARED        = os.getenv("TICKER_SHARED")
+MODES_PATH     = os.path.join(os.path.dirname(_SHARED), "ticker-modes.json") if _SHARED else None
+PROFILE_COOKIE = "ticker_profile"   # remembers a display's profile between requests
+DEFAULT        = "default"
+MODES          = ("sports", "fantasy")
+LAYOUTS        = ("scroll", "pages")   # one scrolling grid, or /data?per=&page= pages in turn
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    """
+    One named display setup. Displays sharing a profile share its mode;
+    `leagues` (display order) and `favorites` (team names, shown first
+    within their league) pick the slice of the shared snapshot it sees.
+    """
+    name:      str
+    mode:      str = "sports"
+    leagues:   tuple | None = None      # LEAGUE_NAMES in display order; None = all, () = none
+    favorites: frozenset = frozenset()  # lower-cased team names
+    token:     str | None = None        # alternative to ?profile=<name>
+    layout:    str = "scroll"           # LAYOUTS
+
+    @property
+    def view(self):
+        """Hashable key for Snapshot.view(); None for the full, unordered slate."""
+        if self.leagues is None and not self.favorites:
+            return None
+        return (LEAGUE_NAMES if self.leagues is None else self.leagues, self.favorites)
+
+
+def _parse(name: str, cfg: dict) -> Profile:
+    mode = cfg.get("mode", "sports")
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}")
+    layout = cfg.get("layout", "scroll")
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {layout!r}")
+    leagues = cfg.get("leagues")
+    if leagues is not None:
+        unknown = [lg for lg in leagues if lg not in LEAGUE_NAMES]
+        if unknown:
+            logging.warning("profile %s: ignoring unknown leagues %s", name, unknown)
+        leagues = tuple(lg for lg in dict.fromkeys(leagues) if lg in LEAGUE_NAMES)
+        if not leagues:
+            logging.warning("profile %s: no known leagues listed, it will show no games", name)
+    return Profile(name, mode, leagues,
+                   frozenset(t.lower() for t in cfg.get("favorites", ())),
+                   cfg.get("token"), layout)
+
+
+class Profiles:
+    """
+    Display profiles from PROFILES_PATH (a JSON object of name → settings),
+    plus a built-in `default` showing every league. A display picks one
+    with ?profile=<name> or ?token=<token>; /set_mode switches the mode of
+    that profile only. With `modes_path` the switches (name → mode) are
+    written there, and every process picks them up when the file changes.
+    """
+
+    def __init__(self, path=PROFILES_PATH, modes_path=MODES_PATH):
+        self._lock = threading.Lock()
+        self._modes_path  = modes_path
+        self._modes_stamp = None
+        self._profiles = {DEFAULT: Profile(DEFAULT)}
+        try:
+            with open(path, encoding="utf-8") as f:
+                doc = json.load(f)
+        except FileNotFoundError:
+            doc = {}
+        except Exception as e:
+            logging.warning("ignoring unreadable profiles file %s: %s", path, e)
+            doc = {}
+        for name, cfg in doc.items():
+            try:
+                self._profiles[name] = _parse(name, cfg)
+            except (ValueError, TypeError, AttributeError) as e:
+                logging.warning("skipping profile %s: %s", name, e)
+        self._tokens = {p.token: p.name for p in self._profiles.values() if p.token}
+        self._base = dict(self._profiles)      # as configured, before any /set_mode
+        if len(self._profiles) > 1:
+            logging.info("loaded %d display profiles from %s", len(self._profiles), path)
+
+    def _read_modes(self) -> dict:
+        try:
+            with open(self._modes_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning("ignoring unreadable mode switches %s: %s", self._modes_path, e)
+            return {}
+
+    def _apply(self, modes: dict):
+        self._profiles = {name: replace(p, mode=modes[name]) if modes.get(name) in MODES else p
+                          for name, p in self._base.items()}
+
+    def _sync(self):
+        """Adopt mode switches made by other processes since the last look."""
+        if not self._modes_path:
+            return
+        try:
+            stamp = os.stat(self._modes_path).st_mtime_ns
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._modes_stamp:
+            with self._lock:
+                self._modes_stamp = stamp
+                self._apply(self._read_modes())
+
+    def get(self, name=None, token=None) -> Profile | None:
+        """Profile by token or name; the default when neither is given."""
+        self._sync()
+        if token:
+            name = self._tokens.get(token)
+            if name is None:
+                return None
+        return self._profiles.get(name or DEFAULT)
+
+    def set_mode(self, name: str, mode: str) -> Profile:
+        with self._lock:
+            if not self._modes_path:
+                profile = self._profiles[name] = replace(self._profiles[name], mode=mode)
+                return profile
+            modes, tmp = {**self._read_modes(), name: mode}, None
+            try:
+                folder = os.path.dirname(self._modes_path) or "."
+                os.makedirs(folder, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=folder, prefix=".modes-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(modes, f)
+                os.replace(tmp, self._modes_path)
+                self._modes_stamp = os.stat(self._modes_path).st_mtime_ns
+            except OSError as e:    # this process still switches
+                logging.warning("could not share mode switch in %s: %s", self._modes_path, e)
+                if tmp and os.path.exists(tmp):
+                    os.unlink(tmp)
+            self._apply(modes)
+            return self._profiles[name]
+
+
+profiles = Profiles()
@@ -0,0 +1,120 @@
+"""
+Record / replay of the ticker's ESPN HTTP traffic.
+
+    python replay.py capture fixtures/sat [--fantasy]   # save live responses
+    TICKER_REPLAY=fixtures/sat flask run                # serve them offline
+
+Capture mounts a recording transport on the shared scoreboard session (and
+on espn_api's requests, for fantasy box scores) and runs one full crawl;
+every 200 response body is written to the fixtures folder. Replay mounts a
+transport that answers the same requests from those files, so
+get_all_events, fetch_league, the poller and the fantasy module run
+unchanged without network access.
+"""
+import argparse, hashlib, json, logging, os, re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import sports_data
+
+
+def fixture_name(url: str, headers=None) -> str:
+    """Stable file name for a request: readable path slug + hash of the exact query."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    filt  = (headers or {}).get("x-fantasy-filter", "")
+    digest = hashlib.sha1(f"{parts.netloc}{parts.path}?{query}|{filt}".encode()).hexdigest()
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", parts.path.strip("/"))[-60:]
+    return f"{slug}-{digest[:10]}.json"
+
+
+def write_fixture(folder: str, url: str, body: bytes, headers=None) -> str:
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, fixture_name(url, headers))
+    with open(path, "wb") as f:
+        f.write(body)
+    return path
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Real HTTP transport that also saves each 200 response body."""
+
+    def __init__(self, folder: str, **kw):
+        super().__init__(**kw)
+        self.folder = folder
+
+    def send(self, request, **kw):
+        resp = super().send(request, **kw)
+        if resp.status_code == 200:
+            path = write_fixture(self.folder, request.url, resp.content, request.headers)
+            logging.info("recorded %s → %s", request.url, os.path.basename(path))
+        return resp
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport that answers every request from the fixtures folder (404 if absent)."""
+
+    def __init__(self, folder: str):
+        super().__init__()
+        self.folder = folder
+
+    def send(self, request, **kw):
+        resp = requests.Response()
+        resp.request = request
+        resp.url = request.url
+        resp.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        try:
+            with open(os.path.join(self.folder, fixture_name(request.url, request.headers)), "rb") as f:
+                resp._content = f.read()
+            resp.status_code = 200
+        except FileNotFoundError:
+            resp._content = b""
+            resp.status_code = 404
+        return resp
+
+    def close(self):
+        pass
+
+
+def install(adapter):
+    """Route scoreboard, logo and (if importable) espn_api traffic through `adapter`."""
+    sports_data.SESSION.mount("https://", adapter)
+    try:
+        from espn_api.requests import espn_requests
+    except ImportError:
+        return
+    session = requests.Session()
+    session.mount("https://", adapter)
+    espn_requests.requests = session       # the module only ever calls requests.get
+
+
+def replay(folder: str):
+    logging.info("replaying ESPN traffic from %s", folder)
+    install(ReplayAdapter(folder))
+
+
+def capture(folder: str, fantasy: bool = False):
+    install(RecordingAdapter(folder))
+    events, alert = sports_data.get_all_events()
+    print(f"captured {len(events)} events from {len(sports_data.LEAGUES)} leagues"
+          + (f" ({alert})" if alert else ""))
+    if fantasy:
+        from fantasy_football_data import refresh_matchups
+        print(f"captured {len(refresh_matchups())} fantasy matchups")
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump({name: fixture_name(cfg["url"]) for name, cfg in sports_data.LEAGUES.items()},
+                  f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)s: %(message)s")
+    ap = argparse.ArgumentParser(description="Record ESPN responses as replay fixtures.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    cap = sub.add_parser("capture", help="run one live crawl and save every response")
+    cap.add_argument("folder")
+    cap.add_argument("--fantasy", action="store_true", help="also capture fantasy box scores")
+    args = ap.parse_args()
+    capture(args.folder, args.fantasy)
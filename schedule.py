@@ -0,0 +1,111 @@
+import logging, os, threading, time
+from bisect import bisect_right
+from datetime import timedelta
+
+from sports_data import FETCH_TIMEOUT, LEAGUES, SESSION, TimeContext
+
+SCHEDULE_DAYS    = int(os.getenv("TICKER_SCHEDULE_DAYS", 7))   # today + this many days ahead
+SCHEDULE_REFRESH = 24 * 3600   # refetch every league's schedule once a day …
+SCHEDULE_RETRY   = 3600        # … or sooner after a failed fetch
+SCHEDULE_LIMIT   = 1000        # ESPN trims range scoreboards without an explicit limit
+
+
+class Timeline:
+    """One league's scheduled competitions, sorted by start time."""
+    __slots__ = ("starts", "events", "fetched")
+
+    def __init__(self, starts, events, fetched):
+        self.starts  = starts     # epochs, ascending
+        self.events  = events     # models parallel to `starts`; None where the parser skips
+        self.fetched = fetched
+
+    def next_start(self, after: float) -> float | None:
+        """First scheduled start strictly after `after`."""
+        k = bisect_right(self.starts, after)
+        return self.starts[k] if k < len(self.starts) else None
+
+    def next_event(self, after: float, skip=()):
+        """First event starting after `after` whose id is not in `skip`."""
+        for k in range(bisect_right(self.starts, after), len(self.starts)):
+            ev = self.events[k]
+            if ev is not None and ev.id not in skip:
+                return ev
+        return None
+
+
+def _range_url(url: str, ctx: TimeContext, days: int) -> str:
+    first, last = ctx.today, ctx.today + timedelta(days=days)
+    return f"{url}?dates={first:%Y%m%d}-{last:%Y%m%d}&limit={SCHEDULE_LIMIT}"
+
+
+def fetch_timeline(name: str, days=SCHEDULE_DAYS) -> Timeline | None:
+    """The next `days` of a league's scoreboard as a Timeline (None for custom parsers)."""
+    parser = LEAGUES[name]["parser"]
+    if not hasattr(parser, "index"):
+        return None
+    resp = SESSION.get(_range_url(LEAGUES[name]["url"], TimeContext(), days),
+                       timeout=FETCH_TIMEOUT)
+    resp.raise_for_status()
+    index = parser.index(parser.decode(resp.content))
+    # build everything now so the decoded schedule JSON can be dropped
+    return Timeline(index.starts, [_build(index, k) for k in index.by_start()], time.time())
+
+
+def _build(index, k):
+    try:
+        return index.at(k)
+    except (KeyError, TypeError, ValueError, StopIteration):
+        return None     # e.g. a playoff slot whose teams are still TBD
+
+
+class Schedule:
+    """
+    Daily prefetch of every league's upcoming schedule. The poller reads
+    the timelines to sleep until a league's next start instead of polling
+    an empty or finished slate, and to offer a "next up" game. `on_change`
+    is called with the names of leagues whose timeline was replaced.
+    """
+
+    def __init__(self, leagues=LEAGUES, days=SCHEDULE_DAYS):
+        self.leagues   = leagues
+        self.days      = days
+        self.timelines = {}
+        self._thread   = None
+        self._stop     = threading.Event()
+
+    def get(self, name: str) -> Timeline | None:
+        return self.timelines.get(name)
+
+    def refresh(self) -> tuple[list, bool]:
+        """Refetch every league; (names updated, whether every league succeeded)."""
+        updated, ok = [], True
+        for name in self.leagues:
+            try:
+                timeline = fetch_timeline(name, self.days)
+            except Exception as e:
+                logging.warning("%s schedule fetch failed: %s", name, e)
+                ok = False
+                continue
+            if timeline is not None:
+                self.timelines[name] = timeline
+                updated.append(name)
+        logging.info("schedule: %d leagues, %d upcoming starts", len(updated),
+                     sum(len(self.timelines[n].starts) for n in updated))
+        return updated, ok
+
+    def start(self, on_change=None):
+        if self._thread:
+            return
+
+        def run():
+            while not self._stop.is_set():
+                updated, ok = self.refresh()
+                if updated and on_change:
+                    on_change(updated)
+                self._stop.wait(SCHEDULE_REFRESH if ok else SCHEDULE_RETRY)
+
+        self._thread = threading.Thread(target=run, name="schedule", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
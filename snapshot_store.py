@@ -0,0 +1,110 @@
+import json, logging, os, tempfile, threading, time
+
+from models import to_json
+
+STORE_PATH  = os.getenv("TICKER_CACHE",
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     "cache", "snapshot.json"))
+FLUSH_DELAY = 30    # seconds changes are batched before hitting the SD card
+
+
+def section_path(path: str, section: str) -> str:
+    """File of one store section: `path` itself for leagues, <stem>-<section>.json otherwise."""
+    if section == "leagues":
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{section}{ext or '.json'}"
+
+
+class SnapshotStore:
+    """
+    Last good data per section ("leagues" → name, and "fantasy"), so a
+    restart can serve something immediately. Each section has its own JSON
+    file (see section_path): under gunicorn only the polling worker saves
+    leagues while any worker may save fantasy, and a process only ever
+    rewrites the sections it changed, never another worker's from its own
+    stale copy. Updates are batched: changed sections are rewritten
+    atomically at most every FLUSH_DELAY.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path   = path
+        self._lock  = threading.Lock()
+        self._timer = None
+        self._dirty = set()
+        self._doc   = self._read(path)
+        fantasy = self._read(section_path(path, "fantasy"))
+        if "fantasy" in fantasy:    # else keep one from a single-file store, if any
+            self._doc["fantasy"] = fantasy["fantasy"]
+
+    def _read(self, path) -> dict:
+        try:
+            with open(path, encoding="utf-8") as f:
+                doc = json.load(f)
+            logging.info("loaded snapshot cache %s (saved %s)", path,
+                         time.strftime("%Y-%m-%d %H:%M", time.localtime(doc.get("saved", 0))))
+            return doc
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning("ignoring unreadable snapshot cache %s: %s", path, e)
+            return {}
+
+    # ---- readers
+    def league(self, name: str):
+        """(updated, [event dicts]) last stored for a league, or None."""
+        entry = self._doc.get("leagues", {}).get(name)
+        return (entry["updated"], entry["events"]) if entry else None
+
+    def fantasy(self):
+        """(updated, matchups) last stored for fantasy mode, or None."""
+        entry = self._doc.get("fantasy")
+        return (entry["updated"], entry["events"]) if entry else None
+
+    # ---- writers
+    def save_league(self, name: str, updated: float, events):
+        with self._lock:
+            self._doc.setdefault("leagues", {})[name] = {
+                "updated": updated,
+                "events":  [ev.to_dict() for ev in events],
+            }
+            self._schedule("leagues")
+
+    def save_fantasy(self, updated: float, events):
+        with self._lock:
+            self._doc["fantasy"] = {"updated": updated, "events": events}
+            self._schedule("fantasy")
+
+    def _schedule(self, section: str):
+        self._dirty.add(section)
+        if self._timer is None:
+            self._timer = threading.Timer(FLUSH_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the changed sections now: temp file in the same dir, then rename."""
+        with self._lock:
+            self._timer = None
+            saved = time.time()
+            data = {section: to_json({"saved": saved, section: self._doc[section]})
+                    for section in self._dirty}
+            self._dirty = set()
+        for section, body in data.items():
+            path, tmp = section_path(self.path, section), None
+            try:
+                folder = os.path.dirname(path)
+                os.makedirs(folder, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=folder, prefix=".snapshot-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(body)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+            except OSError as e:
+                logging.warning("snapshot cache write failed: %s", e)
+                if tmp and os.path.exists(tmp):
+                    os.unlink(tmp)
+
+
+store = SnapshotStore()
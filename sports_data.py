@@ -1,513 +1,746 @@
-import logging, requests
-from datetime import datetime, timedelta
+import hashlib, io, json, logging, os, random, requests, threading, time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, time as dtime, timedelta
+from operator import itemgetter
 from zoneinfo import ZoneInfo
 from collections import OrderedDict
 
-# ─────────────────────────── helper util
-def team_logo(team_json):
-    if team_json["team"].get("logo"):
-        return team_json["team"]["logo"]
-    logos = team_json["team"].get("logos") or []
-    return logos[0]["href"] if logos else ""
+import metrics
+from leagues import LEAGUE_NAMES
+from logo_cache import proxy_url
+from models import Event, FormulaOneSession
 
-# ─────────────────────────── MLB parser
-def parse_mlb(raw_json) -> list[dict]:
-    out = []
-    today = datetime.now(ZoneInfo("America/New_York")).date()
-    for ev in raw_json.get("events", []):
-        comp = ev["competitions"][0]
-        status = comp["status"]["type"]
-        state = status["state"]
-        if state == "pre":
-            ongoing = False
-        else:
-            ongoing = state != "post"
-
-        teams = comp["competitors"]
-        home = next(t for t in teams if t["homeAway"] == "home")
-        away = next(t for t in teams if t["homeAway"] == "away")
-
-        away_pts = int(away.get("score", 0))
-        home_pts = int(home.get("score", 0))
-
-        out.append({
-            "league":    "MLB",
-            "away":      away["team"]["shortDisplayName"],
-            "away_logo": team_logo(away),
-            "home":      home["team"]["shortDisplayName"],
-            "home_logo": team_logo(home),
-            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
-            "status":    status["shortDetail"],
-            "winner":    "away" if state=="post" and away_pts>home_pts
-                        else "home" if state=="post" and home_pts>away_pts
-                        else None,
-            "ongoing":   ongoing
-        })
-    return out
-
-# ─────────────────────────── ATP Men's Singles parser
-def parse_atp(raw_json) -> list[dict]:
-    out = []
-    today = datetime.now(ZoneInfo("America/New_York")).date()
-    for ev in raw_json.get("events", []):
-        for grp in ev.get("groupings", []):
-            if grp.get("grouping", {}).get("slug") != "mens-singles":
-                continue
-            for comp in grp.get("competitions", []):
-                local = datetime.fromisoformat(
-                    comp["date"].replace("Z","+00:00")
-                ).astimezone(ZoneInfo("America/New_York"))
-                if local.date() != today:
-                    continue
-
-                a, h = comp["competitors"]
-                # build “6-4 7-5”
-                sets=[]
-                for i in range(len(a.get("linescores",[]))):
-                    s1 = str(int(float(a["linescores"][i]["value"])))
-                    s2 = str(int(float(h["linescores"][i]["value"])))
-                    sets.append(f"{s1}-{s2}")
-                score = " ".join(sets) if sets else "-"
-
-                status = comp["status"]["type"]
-                out.append({
-                    "league":    "ATP Men's Singles",
-                    "away":      a["athlete"]["shortName"],
-                    "away_logo": a["athlete"].get("flag",{}).get("href",""),
-                    "home":      h["athlete"]["shortName"],
-                    "home_logo": h["athlete"].get("flag",{}).get("href",""),
-                    "score":     score,
-                    "status":    status["shortDetail"],
-                    "winner":    "away" if a.get("winner") else "home" if h.get("winner") else None,
-                    "ongoing":   status["state"] not in ("pre","post")
-                })
-    return out
-
-
-def parse_wta(raw_json) -> list[dict]:
-    out = []
-    today = datetime.now(ZoneInfo("America/New_York")).date()
-    for ev in raw_json.get("events", []):
-        for grp in ev.get("groupings", []):
-            if grp.get("grouping", {}).get("slug") != "womens-singles":
-                continue
-            for comp in grp.get("competitions", []):
-                local = datetime.fromisoformat(
-                    comp["date"].replace("Z","+00:00")
-                ).astimezone(ZoneInfo("America/New_York"))
-                if local.date() != today:
-                    continue
-
-                a, h = comp["competitors"]
-                # build “6-4 7-5”
-                sets=[]
-                for i in range(len(a.get("linescores",[]))):
-                    s1 = str(int(float(a["linescores"][i]["value"])))
-                    s2 = str(int(float(h["linescores"][i]["value"])))
-                    sets.append(f"{s1}-{s2}")
-                score = " ".join(sets) if sets else "-"
-
-                status = comp["status"]["type"]
-                out.append({
-                    "league":    "WTA Women's Singles",
-                    "away":      a["athlete"]["shortName"],
-                    "away_logo": a["athlete"].get("flag",{}).get("href",""),
-                    "home":      h["athlete"]["shortName"],
-                    "home_logo": h["athlete"].get("flag",{}).get("href",""),
-                    "score":     score,
-                    "status":    status["shortDetail"],
-                    "winner":    "away" if a.get("winner") else "home" if h.get("winner") else None,
-                    "ongoing":   status["state"] not in ("pre","post")
-                })
-    return out
-
-
-
-# ─────────────────────────── NFL parser
-def parse_nfl(raw_json) -> list[dict]:
+try:                        # optional (in requirements.txt): stream-decodes scoreboards
+    import ijson
+except ImportError:
+    ijson = None
+
+TZ             = ZoneInfo(os.getenv("TICKER_TZ", "America/New_York"))   # what "today" means
+GRACE_HOURS    = 4     # before 4 AM local, unfinished games from yesterday stay visible
+UPCOMING_HOURS = float(os.getenv("TICKER_UPCOMING_HOURS", 24))   # reach of the "upcoming" window
+
+# ─────────────────────────── time context
+class TimeContext:
     """
-    ESPN NFL scoreboard canonical event list **for today's date in ET**.
-    - If run between 00:00-03:59 ET it will also keep unfinished games that
-    started yesterday (so the late MNF game stays visible after midnight).
+    Clock snapshot shared by every parser in one crawl, so leagues fetched
+    either side of midnight still agree on what "today" is. Day boundaries
+    are precomputed as epochs in the display timezone (TZ).
     """
-    tz_et = ZoneInfo("America/New_York")
-    now_et = datetime.now(tz_et)
-    today = now_et.date()
-    yday = today - timedelta(days=1)
-    keep_yday = now_et.hour < 4
-
-    out = []
-    for ev in raw_json.get("events", []):
-        comp = ev["competitions"][0]
-
-        # local start date
-        local_start = datetime.fromisoformat(
-            comp["date"].replace("Z", "+00:00")
-        ).astimezone(tz_et).date()
-
-        if local_start not in (today, yday):
-            continue
-        if local_start == yday and not keep_yday:
-            continue
-
-        status = comp["status"]["type"]
-        state = status["state"] # pre | in | post
-
-        teams = comp["competitors"]
-        home = next(t for t in teams if t["homeAway"] == "home")
-        away = next(t for t in teams if t["homeAway"] == "away")
-
-        away_pts = int(away.get("score", 0))
-        home_pts = int(home.get("score", 0))
-
-        out.append({
-            "league":    "NFL",
-            "away":      away["team"]["shortDisplayName"],
-            "away_logo": away["team"]["logo"],
-            "home":      home["team"]["shortDisplayName"],
-            "home_logo": home["team"]["logo"],
-            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
-            "status":    status["shortDetail"],   # e.g. "Final", "Q3 12:34"
-            "winner":    "away" if state=="post" and away_pts>home_pts
-                        else "home" if state=="post" and home_pts>away_pts
-                        else None,
-            "ongoing":   state not in ("pre", "post")
-        })
-    return out
-
-
-def parse_nba(raw_json) -> list[dict]:
+    __slots__ = ("now", "today", "keep_yday", "yday_start", "day_start", "day_end")
+
+    def __init__(self, now=None):
+        self.now        = now or datetime.now(TZ)
+        self.today      = self.now.date()
+        self.keep_yday  = self.now.hour < GRACE_HOURS
+        midnight        = lambda day: datetime.combine(day, dtime(), TZ).timestamp()
+        self.yday_start = midnight(self.today - timedelta(days=1))
+        self.day_start  = midnight(self.today)
+        self.day_end    = midnight(self.today + timedelta(days=1))
+
+    @property
+    def window(self):
+        """Everything a date-window rule depends on (used as a cache key)."""
+        return self.today, self.keep_yday
+
+
+# start epochs keyed by competition id, re-parsed only if ESPN reschedules
+_STARTS: dict[str, tuple[str, float]] = {}
+_STARTS_MAX = 4096
+
+
+def start_epoch(comp) -> float:
+    """When a competition starts, as a UTC epoch."""
+    raw = comp["date"]
+    hit = _STARTS.get(comp["id"])
+    if hit and hit[0] == raw:
+        return hit[1]
+    epoch = datetime.fromisoformat(raw.replace("Z", "+00:00")).timestamp()
+    if len(_STARTS) >= _STARTS_MAX:
+        _STARTS.clear()
+    _STARTS[comp["id"]] = (raw, epoch)
+    return epoch
+
+
+# ─────────────────────────── projected decoding
+# Scoreboards carry odds, broadcasts, leaders, links and notes the parsers
+# never read. Team parsers declare the fields they do read, and with
+# ijson's C backend (in requirements.txt) a large body is decoded one event
+# at a time with only those fields kept: the full tree is never in memory
+# at once, and the response cache's StartIndex holds a fraction of it.
+# Streaming is 2-3x slower than json.loads and only lowers peak memory
+# once the body is a few hundred KiB of small events (full college slates),
+# so smaller bodies, and tennis/F1 (one large event per tournament or race
+# weekend), are decoded in full. So is everything without the C backend:
+# the pure-Python one is far slower still.
+STREAM_DECODE = ijson is not None and ijson.backend in ("yajl2_c", "yajl2_cffi")
+STREAM_MIN_BYTES = 256 * 1024
+
+
+def fields(*paths) -> dict:
+    """Dotted paths, relative to one scoreboard event, as a projection tree."""
+    tree = {}
+    for path in paths:
+        *parents, leaf = path.split(".")
+        node = tree
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = True
+    return tree
+
+
+def project(node, tree):
+    """Copy of `node` keeping only the keys in `tree`; lists are mapped over."""
+    if isinstance(node, list):
+        return [project(item, tree) for item in node]
+    if not isinstance(node, dict):
+        return node
+    return {key: node[key] if sub is True else project(node[key], sub)
+            for key, sub in tree.items() if key in node}
+
+
+def decode(body: bytes, tree: dict | None) -> dict:
+    """
+    Scoreboard JSON streamed into {"events": [projected event, …]}; in full
+    without a tree, without STREAM_DECODE or below STREAM_MIN_BYTES.
+    """
+    if tree is None or not STREAM_DECODE or len(body) < STREAM_MIN_BYTES:
+        return json.loads(body)
+    events = ijson.items(io.BytesIO(body), "events.item", use_float=True)
+    return {"events": [project(ev, tree) for ev in events]}
+
+
+# ─────────────────────────── start-time index
+# date window rules: the [lo, hi) start epochs a league shows
+WINDOWS = {
+    # whatever the scoreboard returns: no start times needed at all
+    "all":      None,
+    # starts today
+    "today":    lambda ctx: (ctx.day_start, ctx.day_end),
+    # starts today, or started yesterday and it is still before GRACE_HOURS
+    # (so the late MNF / West-coast game stays visible after midnight)
+    "grace":    lambda ctx: (ctx.yday_start if ctx.keep_yday else ctx.day_start, ctx.day_end),
+    # the grace window, stretched to at least UPCOMING_HOURS from now
+    "upcoming": lambda ctx: (ctx.yday_start if ctx.keep_yday else ctx.day_start,
+                             max(ctx.day_end, ctx.now.timestamp() + UPCOMING_HOURS * 3600)),
+}
+
+_UNBUILT = object()
+
+
+class StartIndex:
     """
-    ESPN NBA scoreboard canonical event list.
-    Only games that start today in ET are returned.
-    If run between 00:00-03:59 ET, unfinished games that started
-    yesterday are also kept so late West-coast games remain visible.
+    The competitions of one scoreboard body, in feed order, with their
+    start times sorted into a separate key list. select() bisects a date
+    window out of the keys and builds its events (memoized, so the same
+    body viewed through a later window reuses the same Event objects).
+    Start times are only worked out when a window or the schedule needs
+    them; the "all" window (window None) just builds the feed.
     """
-    tz_et = ZoneInfo("America/New_York")
-    now_et = datetime.now(tz_et)
-    today = now_et.date()
-    yday = today - timedelta(days=1)
-    keep_yday = now_et.hour < 4  # same grace window as MLB
-
-    out = []
-    for ev in raw_json.get("events", []):
-        comp = ev["competitions"][0]
-
-        # convert start time to ET date
-        local_date = datetime.fromisoformat(
-            comp["date"].replace("Z", "+00:00")
-        ).astimezone(tz_et).date()
-
-        if local_date not in (today, yday):
-            continue
-        if local_date == yday and not keep_yday:
-            continue
+    __slots__ = ("window", "build", "pairs", "_starts", "_order", "_built")
+
+    def __init__(self, window, build, pairs):
+        self.window  = window
+        self.build   = build
+        self.pairs   = list(pairs)       # (event json, competition json), feed order
+        self._starts = None              # start epochs, ascending
+        self._order  = None              # feed positions in start order; None if the same
+        self._built  = [_UNBUILT] * len(self.pairs)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def _sort(self):
+        starts = [start_epoch(comp) for _, comp in self.pairs]
+        # ESPN lists a scoreboard by start time, so the sort is usually skipped
+        if any(a > b for a, b in zip(starts, starts[1:])):
+            self._order = sorted(range(len(starts)), key=starts.__getitem__)
+            starts = [starts[k] for k in self._order]
+        self._starts = starts
+
+    @property
+    def starts(self) -> list:
+        if self._starts is None:
+            self._sort()
+        return self._starts
+
+    def by_start(self):
+        """Feed positions in start order, matching `starts`."""
+        self.starts
+        return range(len(self.pairs)) if self._order is None else self._order
+
+    def at(self, k: int):
+        """The competition at feed position k, built (None if its parser skips it)."""
+        ev = self._built[k]
+        if ev is _UNBUILT:
+            ev = self._built[k] = self.build(*self.pairs[k])
+        return ev
+
+    def select(self, ctx) -> list:
+        """Events starting inside the window, in feed order."""
+        if self.window is None:
+            ks = range(len(self.pairs))
+        else:
+            lo, hi = self.window(ctx)
+            i, j = bisect_left(self.starts, lo), bisect_left(self.starts, hi)
+            # a feed out of start order needs its window put back in feed order
+            ks = range(i, j) if self._order is None else sorted(self._order[i:j])
+        return [ev for ev in map(self.at, ks) if ev is not None]
 
-        status = comp["status"]["type"]
-        state = status["state"] # pre | in | post
-
-        teams = comp["competitors"]
-        home = next(t for t in teams if t["homeAway"] == "home")
-        away = next(t for t in teams if t["homeAway"] == "away")
-
-        away_pts = int(away.get("score", 0))
-        home_pts = int(home.get("score", 0))
-
-        out.append({
-            "league":    "NBA",
-            "away":      away["team"]["shortDisplayName"],
-            "away_logo": away["team"]["logo"],
-            "home":      home["team"]["shortDisplayName"],
-            "home_logo": home["team"]["logo"],
-            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
-            "status":    status["shortDetail"], # "Final", "3rd Q 04:21", etc.
-            "winner":    "away" if state=="post" and away_pts>home_pts
-                        else "home" if state=="post" and home_pts>away_pts
-                        else None,
-            "ongoing":   state not in ("pre", "post")
-        })
-    return out
-
-
-def parse_ncaaf(raw_json) -> list[dict]:
+
+class IndexedParser:
     """
-    ESPN College-Football scoreboard → canonical event list.
-    Shows games that *start today* in U.S. Eastern Time
-    (+ unfinished late games from last night if before 4 AM ET).
+    A compiled league parser: `collect` yields the scoreboard's (event,
+    competition) pairs and `build` turns one into a model (or None to skip).
+    index() is one pass over the body; calling the parser is the plain
+    parser(raw_json, ctx) contract, selecting the descriptor's window.
+    `fields` is the projection tree of what collect/build read, for parsers
+    whose large bodies are worth streaming (see decode).
     """
-    tz_et = ZoneInfo("America/New_York")
-    now_et = datetime.now(tz_et)
-    today = now_et.date()
-    yday = today - timedelta(days=1)
-    keep_yday = now_et.hour < 4  # same grace window
-
-    out = []
-    for ev in raw_json.get("events", []):
-        comp = ev["competitions"][0]
-
-        # local start date in ET
-        local_date = datetime.fromisoformat(
-            comp["date"].replace("Z", "+00:00")
-        ).astimezone(tz_et).date()
-
-        if local_date not in (today, yday):
-            continue
-        if local_date == yday and not keep_yday:
-            continue
+    __slots__ = ("window", "collect", "build", "fields")
 
-        status = comp["status"]["type"]
-        state = status["state"] # pre | in | post
-
-        teams = comp["competitors"]
-        home = next(t for t in teams if t["homeAway"] == "home")
-        away = next(t for t in teams if t["homeAway"] == "away")
-
-        away_pts = int(away.get("score", 0))
-        home_pts = int(home.get("score", 0))
-
-        out.append({
-            "league":    "NCAA Football",
-            "away":      away["team"]["shortDisplayName"],
-            "away_logo": away["team"]["logo"],
-            "home":      home["team"]["shortDisplayName"],
-            "home_logo": home["team"]["logo"],
-            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
-            "status":    status["shortDetail"],   # "Final", "3rd 08:15", etc.
-            "winner":    "away" if state=="post" and away_pts>home_pts
-                        else "home" if state=="post" and home_pts>away_pts
-                        else None,
-            "ongoing":   state not in ("pre", "post")
-        })
-    return out
-
-
-def parse_ncaamb(raw_json) -> list[dict]:
+    def __init__(self, window: str, collect, build, fields=None):
+        self.window  = WINDOWS[window]
+        self.collect = collect
+        self.build   = build
+        self.fields  = fields
+
+    def decode(self, body: bytes) -> dict:
+        return decode(body, self.fields)
+
+    def index(self, raw_json) -> StartIndex:
+        return StartIndex(self.window, self.build, self.collect(raw_json))
+
+    def __call__(self, raw_json, ctx=None) -> list:
+        return self.index(raw_json).select(ctx or TimeContext())
+
+
+# ─────────────────────────── descriptor building blocks
+
+
+def team_logo(team):
+    if team.get("logo"):
+        return team["logo"]
+    logos = team.get("logos") or []
+    return logos[0]["href"] if logos else ""
+
+
+def flag(athlete_json):
+    return athlete_json.get("flag", {}).get("href", "")
+
+
+# logo strategies for team competitors; every image URL handed to the
+# front-end goes through proxy_url() so kiosks load it from /logo/
+LOGOS = {
+    "logo":  lambda team: proxy_url(team["logo"]),
+    "logos": lambda team: proxy_url(team_logo(team)),   # falls back to the first of team.logos
+}
+
+
+def _points(away, home):
+    return f"{away.get('score','-')} : {home.get('score','-')}"
+
+
+def _sets(away, home):
+    # build “6-4 7-5”
+    sets = []
+    for i in range(len(away.get("linescores", []))):
+        s1 = str(int(float(away["linescores"][i]["value"])))
+        s2 = str(int(float(home["linescores"][i]["value"])))
+        sets.append(f"{s1}-{s2}")
+    return " ".join(sets) if sets else "-"
+
+
+# score formats
+SCORES = {
+    "points": _points,
+    "sets":   _sets,
+}
+
+
+# ─────────────────────────── parser engine
+def team_parser(name: str, desc: dict):
     """
-    ESPN men's-college-basketball scoreboard → canonical event list.
-    Shows games that start **today (ET)**, plus unfinished games that
-    began yesterday if it's before 4 AM ET.
+    Compile a head-to-head team-sport parser (NFL, NBA, MLB, …) from its
+    LEAGUES descriptor: `key` (event id prefix), `window`, `logo`, `score`.
     """
-    tz_et = ZoneInfo("America/New_York")
-    now_et = datetime.now(tz_et)
-    today = now_et.date()
-    yday = today - timedelta(days=1)
-    keep_yday = now_et.hour < 4
-
-    out = []
-    for ev in raw_json.get("events", []):
-        comp = ev["competitions"][0]
-
-        # local start date
-        local = datetime.fromisoformat(
-            comp["date"].replace("Z", "+00:00")
-        ).astimezone(tz_et).date()
-
-        if local not in (today, yday):
-            continue
-        if local == yday and not keep_yday:
-            continue
+    label = desc.get("label", name)
+    key   = desc["key"]
+    logo  = LOGOS[desc.get("logo", "logo")]
+    score = SCORES[desc.get("score", "points")]
+
+    def collect(raw_json):
+        return ((ev, ev["competitions"][0]) for ev in raw_json.get("events", []))
 
+    def build(ev, comp):
         status = comp["status"]["type"]
-        state = status["state"] # pre | in | post
-
-        teams = comp["competitors"]
-        home = next(t for t in teams if t["homeAway"] == "home")
-        away = next(t for t in teams if t["homeAway"] == "away")
-
-        away_pts = int(away.get("score", 0))
-        home_pts = int(home.get("score", 0))
-
-        out.append({
-            "league":    "NCAA Basketball",
-            "away":      away["team"]["shortDisplayName"],
-            "away_logo": away["team"]["logo"],
-            "home":      home["team"]["shortDisplayName"],
-            "home_logo": home["team"]["logo"],
-            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
-            "status":    status["shortDetail"],      # "Final", "2nd 05:12", …
-            "winner":    "away" if state=="post" and away_pts>home_pts
-                        else "home" if state=="post" and home_pts>away_pts
-                        else None,
-            "ongoing":   state not in ("pre", "post"),
-        })
-    return out
-
-
-def parse_nhl(raw_json) -> list[dict]:
+        state  = status["state"]   # pre | in | post
+
+        # exactly two competitors, usually listed home first
+        home, away = comp["competitors"]
+        if home["homeAway"] != "home":
+            home, away = away, home
+        home_team, away_team = home["team"], away["team"]
+
+        winner = None
+        if state == "post":
+            away_pts, home_pts = int(away.get("score", 0)), int(home.get("score", 0))
+            winner = "away" if away_pts > home_pts else "home" if home_pts > away_pts else None
+
+        return Event(
+            f"{key}-{comp['id']}",
+            label,
+            name,
+            away_team["shortDisplayName"],
+            logo(away_team),
+            home_team["shortDisplayName"],
+            logo(home_team),
+            score(away, home),
+            status["shortDetail"],      # "Final", "Q3 12:34", …
+            winner,
+            state != "pre" and state != "post",
+            state,
+            comp["date"],
+            away_team.get("abbreviation", ""),
+            home_team.get("abbreviation", ""),
+        )
+
+    return IndexedParser(desc.get("window", "grace"), collect, build, fields(
+        "competitions.id", "competitions.date",
+        "competitions.status.type.state", "competitions.status.type.shortDetail",
+        "competitions.competitors.homeAway", "competitions.competitors.score",
+        "competitions.competitors.linescores.value",
+        "competitions.competitors.team.shortDisplayName",
+        "competitions.competitors.team.abbreviation",
+        "competitions.competitors.team.logo", "competitions.competitors.team.logos.href",
+    ))
+
+
+def tennis_parser(name: str, desc: dict):
     """
-    ESPN NHL scoreboard → canonical event list.
-    Keeps games that start today in ET.
-    If run between 00:00-03:59 ET keeps last-night games still in progress.
+    Compile a tennis parser: one card per match in the `grouping` draw
+    (e.g. "mens-singles") across every event on the scoreboard.
     """
-    tz_et = ZoneInfo("America/New_York")
-    now_et = datetime.now(tz_et)
-    today = now_et.date()
-    yday = today - timedelta(days=1)
-    keep_yday = now_et.hour < 4
-
-    out = []
-    for ev in raw_json.get("events", []):
-        comp = ev["competitions"][0]
-
-        # convert start time to ET date
-        local_date = datetime.fromisoformat(
-            comp["date"].replace("Z", "+00:00")
-        ).astimezone(tz_et).date()
-
-        if local_date not in (today, yday):
-            continue
-        if local_date == yday and not keep_yday:
-            continue
-
+    label    = desc.get("label", name)
+    key      = desc["key"]
+    grouping = desc["grouping"]
+    score    = SCORES[desc.get("score", "sets")]
+
+    def collect(raw_json):
+        for ev in raw_json.get("events", []):
+            for grp in ev.get("groupings", []):
+                if grp.get("grouping", {}).get("slug") == grouping:
+                    for comp in grp.get("competitions", []):
+                        yield ev, comp
+
+    def build(ev, comp):
+        a, h = comp["competitors"]
         status = comp["status"]["type"]
-        state = status["state"] # pre | in | post
-
-        teams = comp["competitors"]
-        home = next(t for t in teams if t["homeAway"] == "home")
-        away = next(t for t in teams if t["homeAway"] == "away")
-
-        away_pts = int(away.get("score", 0))
-        home_pts = int(home.get("score", 0))
-
-        out.append({
-            "league":    "NHL",
-            "away":      away["team"]["shortDisplayName"],
-            "away_logo": away["team"]["logo"],
-            "home":      home["team"]["shortDisplayName"],
-            "home_logo": home["team"]["logo"],
-            "score":     f"{away.get('score','-')} : {home.get('score','-')}",
-            "status":    status["shortDetail"],     # e.g. "Final", "3rd 12:34"
-            "winner":    "away" if state=="post" and away_pts>home_pts
-                        else "home" if state=="post" and home_pts>away_pts
-                        else None,
-            "ongoing":   state not in ("pre", "post"),
-        })
-    return out
-
-
-def parse_f1(raw_json) -> list[dict]:
+        return Event(
+            id        = f"{key}-{comp['id']}",
+            league    = label,
+            sport     = name,
+            away      = a["athlete"]["shortName"],
+            away_logo = proxy_url(flag(a["athlete"])),
+            home      = h["athlete"]["shortName"],
+            home_logo = proxy_url(flag(h["athlete"])),
+            score     = score(a, h),
+            status    = status["shortDetail"],
+            winner    = "away" if a.get("winner") else "home" if h.get("winner") else None,
+            ongoing   = status["state"] not in ("pre","post"),
+            state     = status["state"],
+            start     = comp["date"],
+        )
+
+    return IndexedParser(desc.get("window", "today"), collect, build)
+
+
+def _driver_note(r) -> str | None:
+    """A driver's own status (pit stop, retirement, …) when the feed carries one."""
+    status = r.get("status")
+    if isinstance(status, dict):
+        status = status.get("type", {}).get("shortDetail") or status.get("displayValue")
+    return status if isinstance(status, str) and status else None
+
+
+def f1_parser(name: str, desc: dict):
     """
     ESPN F1 scoreboard → canonical list, one entry per session.
 
     • Pre-session (“pre”): show the entry list ordered by car number
     • Live / Post (“in” | “post”): show the classified result ordered by position
-    • Only sessions that start **today** in US Eastern are emitted.
+    • Only sessions inside the `window` rule (default: today) are emitted.
     """
-    tz_et  = ZoneInfo("America/New_York")
-    today  = datetime.now(tz_et).date()
-    out    = []
-
-    for ev in raw_json.get("events", []):
-        for comp in ev.get("competitions", []):           # ← iterate every session
-            # local start-date filter
-            local_date = datetime.fromisoformat(
-                comp["date"].replace("Z", "+00:00")
-            ).astimezone(tz_et).date()
-            if local_date != today:
-                continue
-
-            status = comp["status"]["type"]
-            state  = status["state"]      # pre | in | post
-
-            racers = comp.get("competitors", [])
-            if len(racers) < 2:
-                continue
-
-            # sort: grid by carNumber before session, else by position
-            if state == "pre":
-                racers.sort(key=lambda r: int(r.get("carNumber", 99)))
-            else:
-                racers.sort(key=lambda r: int(r.get("position", 99)))
+    label = desc.get("label", name)
+    key   = desc["key"]
+
+    def row(r):
+        out = {
+            "id":   str(r.get("id") or r["athlete"]["shortName"]),
+            "pos":  int(r.get("order", r.get("carNumber", 0))),
+            "name": r["athlete"]["shortName"],
+            "flag": proxy_url(flag(r["athlete"]))
+        }
+        note = _driver_note(r)
+        if note:
+            out["note"] = note      # e.g. "PIT", "DNF", on sessions where ESPN sends it
+        return out
+
+    def collect(raw_json):
+        for ev in raw_json.get("events", []):
+            for comp in ev.get("competitions", []):           # ← iterate every session
+                yield ev, comp
+
+    def build(ev, comp):
+        status = comp["status"]["type"]
+        state  = status["state"]      # pre | in | post
 
-            def row(r):
-                return {
-                    "pos":  int(r.get("order", r.get("carNumber", 0))),
-                    "name": r["athlete"]["shortName"],
-                    "flag": r["athlete"].get("flag", {}).get("href", "")
-                }
+        racers = comp.get("competitors", [])
+        if len(racers) < 2:
+            return None
 
-            field_list = [row(r) for r in racers]
+        # sort: grid by carNumber before session, else by position
+        # (a sorted copy: the cached response JSON is shared between polls)
+        if state == "pre":
+            racers = sorted(racers, key=lambda r: int(r.get("carNumber", 99)))
+        else:
+            racers = sorted(racers, key=lambda r: int(r.get("position", 99)))
+
+        n1 = comp["type"].get("abbreviation", ev["shortName"])  # e.g. "FP1", "Qual
+        n2 = ev['shortName']
+
+        return FormulaOneSession(
+            id      = f"{key}-{comp['id']}",
+            league  = label,
+            sport   = name,
+            session = f'{n1} - {n2}',  # FP1 / Qual / Race
+            field   = [row(r) for r in racers],
+            status  = status["shortDetail"],   # "FP1 Final", "Race – Lap 18/52", …
+            ongoing = state not in ("pre", "post"),
+            state   = state,
+            start   = comp["date"],
+        )
 
-            n1 = comp["type"].get("abbreviation", ev["shortName"])  # e.g. "FP1", "Qual
-            n2 = ev['shortName']
+    return IndexedParser(desc.get("window", "today"), collect, build)
 
-            out.append({
-                "league":  "Formula 1",
-                "session": f'{n1} - {n2}',  # FP1 / Qual / Race
-                "field":   field_list,
-                "status":  status["shortDetail"],   # "FP1 Final", "Race – Lap 18/52", …
-                "ongoing": state not in ("pre", "post"),
-                "winner":  None,  # styling flag unused
-            })
 
-    return out
+PARSERS = {
+    "team":   team_parser,
+    "tennis": tennis_parser,
+    "f1":     f1_parser,
+}
 
 
 # ─────────────────────────── registry
+# Each league is pure data: `kind` picks a parser from PARSERS, which is
+# compiled from the rest of the descriptor. An entry may instead supply its
+# own `parser(raw_json, ctx)` callable.
+ESPN = "https://site.api.espn.com/apis/site/v2/sports"
+
 LEAGUES = OrderedDict([
     ("NFL", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/football/nfl/scoreboard",
-        "parser": parse_nfl,
+        "url":    f"{ESPN}/football/nfl/scoreboard",
+        "kind":   "team", "key": "nfl", "window": "grace", "logo": "logo",
     }),
     ("NCAA Football", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/football/college-football/scoreboard",
-        "parser": parse_ncaaf,
+        "url":    f"{ESPN}/football/college-football/scoreboard",
+        "kind":   "team", "key": "ncaaf", "window": "grace", "logo": "logo",
     }),
     ("NBA", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard",
-        "parser": parse_nba,
+        "url":    f"{ESPN}/basketball/nba/scoreboard",
+        "kind":   "team", "key": "nba", "window": "grace", "logo": "logo",
     }),
     ("NCAA Basketball", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/basketball/mens-college-basketball/scoreboard",
-        "parser": parse_ncaamb,
+        "url":    f"{ESPN}/basketball/mens-college-basketball/scoreboard",
+        "kind":   "team", "key": "ncaamb", "window": "grace", "logo": "logo",
     }),
     ("MLB", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/baseball/mlb/scoreboard",
-        "parser": parse_mlb,
+        "url":    f"{ESPN}/baseball/mlb/scoreboard",
+        "kind":   "team", "key": "mlb", "window": "all", "logo": "logos",
     }),
     ("ATP Men's Singles", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/tennis/atp/scoreboard",
-        "parser": parse_atp,
+        "url":    f"{ESPN}/tennis/atp/scoreboard",
+        "kind":   "tennis", "key": "atp", "grouping": "mens-singles",
     }),
     ("WTA Women's Singles", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/tennis/wta/scoreboard",
-        "parser": parse_wta,
+        "url":    f"{ESPN}/tennis/wta/scoreboard",
+        "kind":   "tennis", "key": "wta", "grouping": "womens-singles",
     }),
     ("NHL", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/hockey/nhl/scoreboard",
-        "parser": parse_nhl,
+        "url":    f"{ESPN}/hockey/nhl/scoreboard",
+        "kind":   "team", "key": "nhl", "window": "grace", "logo": "logo",
     }),
     ("Formula 1", {
-        "url":    "https://site.api.espn.com/apis/site/v2/sports/racing/f1/scoreboard",
-        "parser": parse_f1,
+        "url":    f"{ESPN}/racing/f1/scoreboard",
+        "kind":   "f1", "key": "f1", "live_interval": 5,
     }),
 ])
 
-# ─────────────────────────── fetch wrapper
-def fetch_league(name: str):
-    cfg   = LEAGUES[name]
+if tuple(LEAGUES) != LEAGUE_NAMES:
+    raise RuntimeError("leagues.LEAGUE_NAMES does not match the LEAGUES registry")
+
+for _name, _cfg in LEAGUES.items():
+    _cfg.setdefault("parser", PARSERS[_cfg.get("kind", "team")](_name, _cfg))
+
+# ─────────────────────────── fetch engine
+FETCH_TIMEOUT  = 10    # per-request connect/read timeout (s)
+CRAWL_DEADLINE = 15    # wall-clock budget for a whole get_all_events crawl (s)
+
+# one keep-alive pool shared by every league so each crawl reuses the TLS
+# connections to site.api.espn.com instead of handshaking nine times
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=len(LEAGUES), pool_maxsize=len(LEAGUES)))
+
+_POOL = ThreadPoolExecutor(max_workers=len(LEAGUES), thread_name_prefix="espn")
+
+
+# ─────────────────────────── league health / circuit breaker
+RETRIES           = 1          # extra attempts per fetch, if the deadline allows
+RETRY_BACKOFF     = 0.5        # base retry delay (s), doubled per attempt, full jitter
+BACKOFF_BASE      = 60         # first re-poll delay after a failed fetch (s)
+BACKOFF_MAX       = 30 * 60    # cap for the re-poll delay and the breaker cool-down
+BREAKER_THRESHOLD = 3          # consecutive failed fetches that open the breaker
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class LeagueHealth:
+    """
+    Consecutive-failure tracking for one league. After BREAKER_THRESHOLD
+    failures the breaker opens and fetches are skipped until the cool-down
+    (BACKOFF_BASE doubling per further failure, capped) has passed; the next
+    fetch after that is a trial that closes it again on success.
+    """
+    __slots__ = ("failures", "open_until", "last_error", "last_success",
+                 "last_failure", "_lock")
+
+    def __init__(self):
+        self.failures     = 0
+        self.open_until   = 0.0
+        self.last_error   = None
+        self.last_success = None
+        self.last_failure = None
+        self._lock        = threading.Lock()
+
+    def allow(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def succeeded(self, now: float):
+        with self._lock:
+            self.failures     = 0
+            self.open_until   = 0.0
+            self.last_success = now
+
+    def failed(self, err: Exception, now: float):
+        with self._lock:
+            self.failures    += 1
+            self.last_error   = str(err)
+            self.last_failure = now
+            if self.failures >= BREAKER_THRESHOLD:
+                self.open_until = now + self.backoff()
+
+    def backoff(self) -> float:
+        """Jittered delay before the next attempt is worth making."""
+        if not self.failures:
+            return 0.0
+        base = min(BACKOFF_BASE * 2 ** (self.failures - 1), BACKOFF_MAX)
+        return base * random.uniform(0.8, 1.2)
+
+    def retry_in(self, now: float) -> float:
+        """Seconds the poller should wait before fetching this league again."""
+        if self.open_until > now:
+            return self.open_until - now
+        return self.backoff()
+
+    @property
+    def state(self) -> str:
+        if self.open_until > time.time():
+            return "open"
+        return "degraded" if self.failures else "ok"
+
+    def to_dict(self) -> dict:
+        return {
+            "state":        self.state,
+            "failures":     self.failures,
+            "last_error":   self.last_error,
+            "last_success": self.last_success,
+            "retry_at":     self.open_until or None,
+        }
+
+
+HEALTH = {name: LeagueHealth() for name in LEAGUES}
+
+
+def _retryable(err: Exception) -> bool:
+    if isinstance(err, requests.HTTPError):
+        return err.response is not None and err.response.status_code >= 500
+    return isinstance(err, (requests.ConnectionError, requests.Timeout))
+
+
+def _get(url: str, headers: dict, deadline: float):
+    """GET with up to RETRIES jittered retries, never running past `deadline`."""
+    for attempt in range(RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("fetch deadline exceeded")
+        try:
+            resp = SESSION.get(url, timeout=min(FETCH_TIMEOUT, remaining), headers=headers)
+            if resp.status_code != 304:
+                resp.raise_for_status()
+            return resp
+        except Exception as e:
+            delay = random.uniform(0, RETRY_BACKOFF * 2 ** attempt)
+            if (attempt == RETRIES or not _retryable(e)
+                    or time.monotonic() + delay >= deadline):
+                raise
+            logging.info("%s: %s, retrying in %.2fs", url, e, delay)
+            time.sleep(delay)
+
+
+# ─────────────────────────── response cache
+# Last response seen per scoreboard URL: its HTTP validators, a hash of the
+# raw body and the StartIndex built from it, so an unchanged body seen
+# through a new date window (midnight, the end of the grace period, a
+# sliding "upcoming" range) is re-selected without decoding or parsing.
+# Custom parser callables have no index; their events are only reused
+# while TimeContext.window is unchanged.
+_RESPONSES: dict[str, dict] = {}
+
+
+def _cached_events(cached: dict, ctx: TimeContext) -> list | None:
+    if cached["index"] is not None:
+        return cached["index"].select(ctx)
+    return cached["events"] if cached["window"] == ctx.window else None
+
+
+def last_good(name: str, ctx: TimeContext | None = None) -> list:
+    """Events from the league's last successful fetch, if still in the date window."""
+    cached = _RESPONSES.get(LEAGUES[name]["url"])
+    return (cached and _cached_events(cached, ctx or TimeContext())) or []
+
+
+def _load_league(name: str, ctx: TimeContext | None = None,
+                 deadline: float | None = None) -> list:
+    """
+    Fetch and parse one league, short-circuiting when nothing changed:
+    a 304 to our conditional GET, or an identical body, reuses the last
+    parsed event list without decoding or parsing again.
+    Raises CircuitOpen without any I/O while the league's breaker is open.
+    """
+    ctx      = ctx or TimeContext()
+    deadline = deadline or time.monotonic() + CRAWL_DEADLINE
+    health   = HEALTH[name]
+    now      = time.time()
+    if not health.allow(now):
+        metrics.FETCH_ERRORS.inc(name, "circuit_open")
+        raise CircuitOpen(f"circuit open for {int(health.open_until - now)}s")
+
+    cfg     = LEAGUES[name]
+    url     = cfg["url"]
+    indexer = getattr(cfg["parser"], "index", None)
+    decoder = getattr(cfg["parser"], "decode", None)
+    cached  = _RESPONSES.get(url)
+    events  = cached and _cached_events(cached, ctx)
+    if events is None:
+        cached = None
+
+    headers = {}
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["modified"]:
+        headers["If-Modified-Since"] = cached["modified"]
+
+    t0 = time.perf_counter()
     try:
-        raw = requests.get(cfg["url"], timeout=10).json()
-        return cfg["parser"](raw), None
+        resp = _get(url, headers, deadline)
+    except Exception as e:
+        health.failed(e, time.time())
+        metrics.FETCH_ERRORS.inc(name, type(e).__name__)
+        raise
+    finally:
+        metrics.FETCH_SECONDS.observe(time.perf_counter() - t0, name)
+    health.succeeded(time.time())
+    if resp.status_code == 304 and cached:
+        metrics.CACHE_RESULTS.inc(name, "not_modified")
+        return events
+
+    metrics.FETCH_BYTES.observe(len(resp.content), name)
+    digest = hashlib.blake2b(resp.content, digest_size=16).digest()
+    if cached and cached["hash"] == digest:
+        metrics.CACHE_RESULTS.inc(name, "same_body")
+        index = cached["index"]
+    else:
+        metrics.CACHE_RESULTS.inc(name, "parsed")
+        with metrics.DECODE_SECONDS.time(name):
+            raw = decoder(resp.content) if decoder else resp.json()
+        with metrics.PARSE_SECONDS.time(name):
+            if indexer:
+                index = indexer(raw)
+                events = index.select(ctx)
+            else:
+                index = None
+                events = cfg["parser"](raw, ctx)
+        metrics.EVENTS.set(len(events), name)
+
+    _RESPONSES[url] = {
+        "etag":     resp.headers.get("ETag"),
+        "modified": resp.headers.get("Last-Modified"),
+        "hash":     digest,
+        "window":   ctx.window,
+        "index":    index,
+        "events":   events,
+    }
+    return events
+
+
+def fetch_league(name: str, ctx: TimeContext | None = None):
+    """
+    (events, None) on success. On failure, or while the league's breaker is
+    open, (last good events, alert message) instead.
+    """
+    try:
+        return _load_league(name, ctx), None
+    except CircuitOpen as e:
+        logging.info("%s skipped: %s", name, e)
     except Exception as e:
         logging.error("%s fetch error: %s", name, e)
-        return [], f"⚠ {name} fetch failed"
+    return last_good(name, ctx), f"⚠ {name} fetch failed"
 
 
 def get_all_events():
+    """
+    Fan out one fetch per LEAGUES entry on the shared pool and collect the
+    results in registry order. Leagues still outstanding when CRAWL_DEADLINE
+    expires are reported like any other failed fetch; failed leagues
+    contribute their last good events.
+    """
+    with metrics.CRAWL_SECONDS.time():
+        return _crawl()
+
+
+def _crawl():
     all_events = []
     alert_msg  = None
 
-    for name, info in LEAGUES.items():
+    ctx = TimeContext()
+    deadline = time.monotonic() + CRAWL_DEADLINE
+    futures = OrderedDict((name, _POOL.submit(_load_league, name, ctx, deadline))
+                          for name in LEAGUES)
+    wait(futures.values(), timeout=CRAWL_DEADLINE)
+
+    for name, fut in futures.items():
         try:
-            raw = requests.get(info["url"], timeout=10).json()
-            events = info["parser"](raw)
-            for ev in events:
-                ev["sport"] = name
-            all_events.extend(events)
+            if not fut.done():
+                fut.cancel()
+                raise TimeoutError(f"no response within {CRAWL_DEADLINE}s")
+            all_events.extend(fut.result())
         except Exception as e:
             logging.warning(f"{name} fetch failed: {e}")
+            all_events.extend(last_good(name, ctx))
             if not alert_msg:
                 alert_msg = f"{name} fetch failed"
 
-    return all_events, alert_msg
\ No newline at end of file
+    return all_events, alert_msg